@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Work priorities; lower numbers are shed last
+PRIORITY_CORE = 0    # Moving members, never shed
+PRIORITY_NORMAL = 1  # New /dragmee requests
+PRIORITY_LOW = 2     # Status rotation, message cleanup
+
+# Pressure levels
+LEVEL_OK = 0
+LEVEL_ELEVATED = 1  # Low-priority work is deferred
+LEVEL_HIGH = 2      # New requests are shed as well
+
+# (elevated, high) thresholds per signal
+LATENCY_THRESHOLDS = (0.4, 1.0)      # Gateway heartbeat latency, seconds
+RATE_LIMIT_THRESHOLDS = (1, 5)       # 429s in the last RATE_LIMIT_WINDOW seconds
+LOOP_LAG_THRESHOLDS = (0.1, 0.5)     # Smoothed event-loop lag, seconds
+MOVE_QUEUE_THRESHOLDS = (5, 20)      # Moves in flight
+RATE_LIMIT_WINDOW = 30
+
+LAG_PROBE_INTERVAL = 0.5
+DEFER_POLL_INTERVAL = 5
+MAX_DEFER = 300  # Deferred low-priority work is dropped after this many seconds
+DRAIN_RETRY_AFTER = 15  # Suggested wait for requests refused during a restart
+
+
+def _level(value, thresholds):
+    elevated, high = thresholds
+    if value >= high:
+        return LEVEL_HIGH
+    if value >= elevated:
+        return LEVEL_ELEVATED
+    return LEVEL_OK
+
+
+class AdmissionController:
+    """Decides whether new work may start, based on live Discord and event-loop pressure."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.loop_lag = 0.0
+        self.moves_in_flight = 0
+        self.shed = {PRIORITY_NORMAL: 0, PRIORITY_LOW: 0}
+        self.draining = False  # Set on shutdown; new requests are refused, moves and cleanup still run
+        self._lag_task = None
+        self._deferred = {}  # Task -> (coro_fn, description) for low-priority work still waiting
+        self._deferred_tasks = set()  # Strong references; the loop only keeps weak ones
+        self._moves_idle = asyncio.Event()
+        self._moves_idle.set()
+
+    def start(self):
+        """Start the event-loop lag probe; safe to call more than once."""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._probe_loop_lag())
+
+    def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        for task in self._deferred_tasks:
+            task.cancel()
+
+    async def _probe_loop_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = max(0.0, time.perf_counter() - start - LAG_PROBE_INTERVAL)
+            self.loop_lag = self.loop_lag * 0.7 + lag * 0.3  # Smooth out one-off spikes
+
+    def signals(self):
+        latency = self.bot.latency
+        if math.isnan(latency) or math.isinf(latency):
+            latency = 0.0  # Not connected yet; nothing useful to measure
+        rest = getattr(self.bot, "rest", None)
+        return {
+            "latency": latency,
+            "rate_limits": rest.recent_rate_limits(RATE_LIMIT_WINDOW) if rest else 0,
+            "loop_lag": self.loop_lag,
+            "move_queue": self.moves_in_flight,
+        }
+
+    def level(self):
+        signals = self.signals()
+        return max(
+            _level(signals["latency"], LATENCY_THRESHOLDS),
+            _level(signals["rate_limits"], RATE_LIMIT_THRESHOLDS),
+            _level(signals["loop_lag"], LOOP_LAG_THRESHOLDS),
+            _level(signals["move_queue"], MOVE_QUEUE_THRESHOLDS),
+        )
+
+    def check(self, priority):
+        """Return ``(admitted, retry_after)`` for work of the given priority."""
+        if priority == PRIORITY_CORE:
+            return True, 0
+        if self.draining and priority == PRIORITY_NORMAL:
+            self.shed[priority] += 1
+            return False, DRAIN_RETRY_AFTER
+        level = self.level()
+        if level == LEVEL_OK or (priority == PRIORITY_NORMAL and level < LEVEL_HIGH):
+            return True, 0
+        self.shed[priority] += 1
+        retry_after = RATE_LIMIT_WINDOW if level == LEVEL_HIGH else DEFER_POLL_INTERVAL
+        logger.warning(f"Shedding priority {priority} work at pressure level {level}: {self.signals()}")
+        return False, retry_after
+
+    @contextlib.asynccontextmanager
+    async def track_move(self):
+        """Count a member move as in flight for the duration of the block."""
+        self.moves_in_flight += 1
+        self._moves_idle.clear()
+        try:
+            yield
+        finally:
+            self.moves_in_flight -= 1
+            if self.moves_in_flight == 0:
+                self._moves_idle.set()
+
+    async def wait_for_moves(self):
+        await self._moves_idle.wait()
+
+    async def run_low_priority(self, coro_fn, description="low-priority work"):
+        """Run ``coro_fn()`` now if there is headroom, otherwise retry it in the background."""
+        admitted, _ = self.check(PRIORITY_LOW)
+        if admitted:
+            return await coro_fn()
+        task = asyncio.create_task(self._run_deferred(coro_fn, description))
+        self._deferred[task] = (coro_fn, description)
+        self._deferred_tasks.add(task)
+        task.add_done_callback(self._deferred_tasks.discard)
+
+    async def _run_deferred(self, coro_fn, description):
+        deadline = time.monotonic() + MAX_DEFER
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(DEFER_POLL_INTERVAL)
+                if self.level() == LEVEL_OK:
+                    self._deferred.pop(asyncio.current_task(), None)  # Running now, no longer flushable
+                    await self._run_now(coro_fn, description)
+                    return
+            logger.warning(f"Dropped deferred {description} after {MAX_DEFER} seconds under pressure.")
+        finally:
+            self._deferred.pop(asyncio.current_task(), None)
+
+    async def _run_now(self, coro_fn, description):
+        try:
+            await coro_fn()
+        except Exception as e:
+            logger.error(f"Deferred {description} failed: {e}")
+
+    async def flush_deferred(self):
+        """Run all deferred work now instead of waiting out the pressure; used when draining."""
+        waiting = list(self._deferred.items())
+        self._deferred.clear()
+        for task, _ in waiting:
+            task.cancel()
+        for _, (coro_fn, description) in waiting:
+            await self._run_now(coro_fn, description)
+        # Work that had already started gets to finish
+        await asyncio.gather(*self._deferred_tasks, return_exceptions=True)
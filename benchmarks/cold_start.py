@@ -0,0 +1,49 @@
+"""Fails when importing the bot and its startup cogs takes longer than the budget.
+
+    python -m benchmarks.cold_start                 # default budget
+    python -m benchmarks.cold_start --budget 800    # milliseconds
+
+Startup modules are taken from main.py, so new cogs are covered automatically. Flask is
+included too: the keep-alive server imports it on its own thread, but every start pays for it.
+"""
+import argparse
+import ast
+import os
+import sys
+
+import importtime
+from keep_alive import SERVER_IMPORTS
+
+DEFAULT_BUDGET_MS = 1500
+MAIN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def startup_modules():
+    """``main``, the always-loaded cogs (read from main.py without importing it) and the keep-alive server."""
+    with open(MAIN_FILE) as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "cogs" for t in node.targets):
+            return ["main"] + ast.literal_eval(node.value) + SERVER_IMPORTS
+    return ["main"] + SERVER_IMPORTS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import budget check.")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="Maximum cold import time in milliseconds")
+    args = parser.parse_args(argv)
+
+    modules = startup_modules()
+    total_ms, cumulative = importtime.measure(modules)
+    print(f"Cold import: {total_ms:.1f} ms (budget {args.budget:.0f} ms)")
+    if total_ms > args.budget:
+        print("Over budget. Slowest imports:")
+        for name, ms in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"  {ms:>9.1f} ms  {name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Lightweight stand-ins for the discord.py objects the cogs touch.
+
+They only implement the attributes and coroutines the handlers actually use, so a benchmark
+measures the handler itself rather than discord.py's model classes or the network.
+"""
+import asyncio
+import itertools
+
+from admission import AdmissionController
+from tracing import Tracer
+
+_ids = itertools.count(1_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakePermissions:
+    def __init__(self, **flags):
+        self.administrator = flags.get("administrator", False)
+        self.manage_channels = flags.get("manage_channels", True)
+        self.move_members = flags.get("move_members", True)
+        self.connect = flags.get("connect", True)
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild, name="General", user_limit=0):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.user_limit = user_limit
+        self.members = []
+        self.mention = f"<#{self.id}>"
+
+
+class FakeTextChannel:
+    def __init__(self, guild, name="drag-requests"):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        return FakeMessage(self, content)
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None):
+        self.id = next_id()
+        self.channel = channel
+        self.content = content
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+    async def edit(self, **kwargs):
+        self.content = kwargs.get("content", self.content)
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeMember:
+    def __init__(self, guild, name, permissions=None):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.bot = False
+        self.mention = f"<@{self.id}>"
+        self.guild_permissions = permissions or FakePermissions()
+        self.roles = []
+        self.voice = None
+        self.moves = 0
+
+    def join(self, channel):
+        if self.voice is not None:
+            self.voice.channel.members.remove(self)
+        self.voice = FakeVoiceState(channel) if channel is not None else None
+        if channel is not None:
+            channel.members.append(self)
+
+    async def move_to(self, channel, **kwargs):
+        self.moves += 1
+        self.join(channel)
+
+
+class FakeGuild:
+    def __init__(self, name="Bench Guild"):
+        self.id = next_id()
+        self.name = name
+        self.me = FakeMember(self, "bot", FakePermissions(administrator=True))
+        self.members = {}
+        self.channels = {}
+        self.voice_channels = []
+        self.stage_channels = []
+        self.text_channels = []
+
+    def add_member(self, name, **permissions):
+        member = FakeMember(self, name, FakePermissions(**permissions) if permissions else None)
+        self.members[member.id] = member
+        return member
+
+    def add_voice_channel(self, name="General", user_limit=0):
+        channel = FakeVoiceChannel(self, name, user_limit)
+        self.channels[channel.id] = channel
+        self.voice_channels.append(channel)
+        return channel
+
+    def add_text_channel(self, name="drag-requests"):
+        channel = FakeTextChannel(self, name)
+        self.channels[channel.id] = channel
+        self.text_channels.append(channel)
+        return channel
+
+    async def create_text_channel(self, name, **kwargs):
+        return self.add_text_channel(name)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = 0
+        self._done = False
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent += 1
+        self._done = True
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    def is_done(self):
+        return self._done
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        return None
+
+
+class FakeInteraction:
+    def __init__(self, client, guild, user, channel):
+        self.id = next_id()
+        self.client = client
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    def reset(self):
+        """Reuse the same interaction for another call."""
+        self.response = FakeResponse()
+        return self
+
+
+class FakeBot:
+    def __init__(self, guilds=()):
+        self.guilds = list(guilds)
+        self.latency = 0.05
+        self.presence_updates = 0
+        self.dispatched = 0
+        self.admission = AdmissionController(self)
+        self.tracer = Tracer(sample_rate=0)
+
+    def dispatch(self, event, *args, **kwargs):
+        self.dispatched += 1
+
+    def is_ready(self):
+        return True
+
+    async def wait_until_ready(self):
+        # Keeps background task loops parked for the duration of a benchmark
+        await asyncio.Event().wait()
+
+    async def change_presence(self, **kwargs):
+        self.presence_updates += 1
+
+    def get_guild(self, guild_id):
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
@@ -0,0 +1,289 @@
+"""Micro-benchmarks for the cog hot paths, with a saved baseline as a regression gate.
+
+Run from the repository root:
+
+    python -m benchmarks.hot_paths            # compare against benchmarks/baseline.json
+    python -m benchmarks.hot_paths --save     # record a new baseline
+
+The process exits with status 1 when any benchmark is slower, or allocates more per call,
+than its baseline by more than the threshold (25% by default), or when there is no baseline.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeBot, FakeGuild, FakeInteraction
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_ITERATIONS = 2000
+TIMING_ROUNDS = 5
+SAVE_RUNS = 3  # Processes folded into a saved baseline
+ALLOC_SAMPLES = 200  # Calls traced with tracemalloc; tracing is too slow to do for every call
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register an async factory that prepares state and returns the coroutine function to time."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+def _dragme_world():
+    import config
+    from cogs import setup as setup_module
+
+    guild = FakeGuild()
+    bot = FakeBot([guild])
+    requests_channel = guild.add_text_channel()
+    setup_module.request_channels[str(guild.id)] = str(requests_channel.id)
+    config.rebuild(setup_module.request_channels)
+    lobby = guild.add_voice_channel("Lobby")
+    room = guild.add_voice_channel("Room")
+    requester = guild.add_member("requester")
+    target = guild.add_member("target")
+    requester.join(lobby)
+    target.join(room)
+    return bot, guild, requests_channel, requester, target, room
+
+
+@benchmark("dragme")
+async def bench_dragme():
+    from cogs.dragme import DragmeCog, pending_requests
+
+    bot, guild, requests_channel, requester, target, _ = _dragme_world()
+    cog = DragmeCog(bot)
+    interaction = FakeInteraction(bot, guild, requester, requests_channel)
+    target_value = str(target.id)
+
+    async def step():
+        cog.cooldowns.clear()  # Every call should take the full path, not the cooldown early exit
+        await cog.dragme.callback(cog, interaction.reset(), target_value)
+        # Resolve the request, or the harness itself would retain a view and an armed timer per call
+        for view in list(pending_requests.values()):
+            view.finish("rejected")
+    return step
+
+
+async def _button_bench(button_name):
+    from cogs.dragme import DragmeButtons
+
+    bot, guild, requests_channel, requester, target, room = _dragme_world()
+    view = DragmeButtons(target, requester, room, bot=bot)
+    view.request_message = await requests_channel.send("request")
+    interaction = FakeInteraction(bot, guild, target, requests_channel)
+    button = getattr(view, button_name)
+
+    async def step():
+        view.finished = False  # Reuse one view instead of timing View construction
+        await button.callback(interaction.reset())
+    return step
+
+
+@benchmark("accept_button")
+async def bench_accept_button():
+    return await _button_bench("accept_button")
+
+
+@benchmark("reject_button")
+async def bench_reject_button():
+    return await _button_bench("reject_button")
+
+
+def _request_channels_fixture(guild_count=500):
+    from cogs import setup as setup_module
+
+    setup_module.request_channels.clear()
+    for i in range(guild_count):
+        setup_module.request_channels[str(10**17 + i)] = str(10**18 + i)
+    return setup_module
+
+
+@benchmark("save_request_channels")
+async def bench_save_request_channels():
+    setup_module = _request_channels_fixture()
+
+    async def step():
+        setup_module.save_request_channels()
+    return step
+
+
+@benchmark("load_request_channels")
+async def bench_load_request_channels():
+    setup_module = _request_channels_fixture()
+    setup_module.save_request_channels()
+
+    async def step():
+        setup_module.load_request_channels()
+    return step
+
+
+@benchmark("change_status")
+async def bench_change_status():
+    from cogs.status_changer import StatusCog
+
+    bot = FakeBot()
+    cog = StatusCog(bot)
+
+    async def step():
+        await cog.change_status("Listening to /help")
+    step.cleanup = cog.cog_unload
+    return step
+
+
+async def measure(step, iterations):
+    """Return mean nanoseconds per call, mean peak bytes allocated per call and retained blocks."""
+    for _ in range(min(50, iterations)):
+        await step()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    # Best of several rounds: the minimum is the least disturbed by other load on the machine
+    rounds = max(1, min(TIMING_ROUNDS, iterations))
+    per_round = iterations // rounds
+    best = None
+    gc.disable()  # As timeit does; a collection landing in one round skews small benchmarks
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(per_round):
+                await step()
+            elapsed = (time.perf_counter_ns() - start) / per_round
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        gc.enable()
+    # Steps never yield, so let the loop purge cancelled timers once, as it would between real events
+    await asyncio.sleep(0)
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / (rounds * per_round)
+
+    tracemalloc.start()
+    total_peak = 0
+    for _ in range(ALLOC_SAMPLES):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        await step()
+        _, peak = tracemalloc.get_traced_memory()
+        total_peak += peak - current
+    tracemalloc.stop()
+
+    return {
+        "ns_per_call": best,
+        "bytes_per_call": total_peak / ALLOC_SAMPLES,
+        "retained_blocks_per_call": retained,
+    }
+
+
+async def run(names, iterations):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # The cogs read and write their JSON files relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name in names:
+                step = await BENCHMARKS[name]()
+                try:
+                    results[name] = await measure(step, iterations)
+                finally:
+                    cleanup = getattr(step, "cleanup", None)
+                    if cleanup:
+                        cleanup()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of human-readable regressions."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("ns_per_call", "bytes_per_call"):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {metric} {result[metric]:.0f} vs baseline {base[metric]:.0f} "
+                    f"(+{(result[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _run_in_subprocesses(names, iterations, count):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(count):
+            path = os.path.join(workdir, f"run{i}.json")
+            subprocess.run([sys.executable, "-m", "benchmarks.hot_paths", "--save", "--runs", "1",
+                            "--iterations", str(iterations), "--baseline", path, *names],
+                           check=True, stdout=subprocess.DEVNULL, cwd=os.path.dirname(os.path.dirname(BASELINE_FILE)))
+            with open(path) as f:
+                results.append(json.load(f)["results"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cog hot paths.")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before failing, as a fraction (default 0.25)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--runs", type=int, default=SAVE_RUNS,
+                        help="Separate processes whose slowest timings make up a saved baseline")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    args = parser.parse_args(argv)
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    logging.disable(logging.CRITICAL)  # Handlers log on every call; keep the output readable
+    results = asyncio.run(run(names, args.iterations))
+    if args.save and args.runs > 1:
+        # Timings of small handlers vary from process to process; record the slowest of a few fresh
+        # processes so the gate only trips on changes bigger than that noise
+        for result in _run_in_subprocesses(names, args.iterations, args.runs - 1):
+            for name, timing in result.items():
+                results[name]["ns_per_call"] = max(results[name]["ns_per_call"], timing["ns_per_call"])
+
+    for name, result in results.items():
+        print(f"{name:<24} {result['ns_per_call'] / 1000:>10.2f} us/call "
+              f"{result['bytes_per_call']:>10.0f} B/call "
+              f"{result['retained_blocks_per_call']:>8.2f} retained blocks/call")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results}, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # Without a baseline the gate can't detect anything; don't let that pass silently
+        print(f"No baseline found at {args.baseline}, run with --save to create one.")
+        return 1
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Replay a gateway capture against the cogs with a local fake REST API.
+
+Record a capture by running the bot with ``CAPTURE_FILE=capture.jsonl.gz``, then:
+
+    python -m benchmarks.replay capture.jsonl.gz              # real time
+    python -m benchmarks.replay capture.jsonl.gz --speed 10   # 10x faster
+    python -m benchmarks.replay capture.jsonl.gz --speed 0    # as fast as possible
+
+Interaction latency is measured from feeding INTERACTION_CREATE to the bot until the fake
+API receives that interaction's callback, which is what the user waits for.
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import gzip
+import itertools
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+
+import config
+from admission import AdmissionController
+from rest_client import RestClient
+from tracing import Tracer
+
+REPLAY_COGS = [
+    "cogs.status_changer",
+    "cogs.setup",
+    "cogs.voice_index",
+    "cogs.dragme",
+    "cogs.voice_analytics",
+]
+BOT_USER_ID = "1" + "0" * 17
+
+_ids = itertools.count(int("9" + "0" * 17))
+_interaction_callback = re.compile(r"/interactions/(\d+)/[^/]+/callback")
+_numeric = re.compile(r"/\d+")
+
+
+def _user(user_id, name="replay"):
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "bot": True}
+
+
+def _message(channel_id, message_id=None):
+    return {
+        "id": str(message_id or next(_ids)), "channel_id": channel_id, "author": _user(BOT_USER_ID), "content": "",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(), "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+        "embeds": [], "pinned": False, "type": 0, "components": [],
+    }
+
+
+def _json(data):
+    # discord.py only decodes bodies typed exactly application/json; aiohttp's json_response adds a charset
+    return web.Response(body=json.dumps(data).encode(), headers={"Content-Type": "application/json"})
+
+
+class FakeDiscordAPI:
+    """Answers the REST calls the cogs make with minimal but well-formed payloads."""
+
+    def __init__(self):
+        self.requests = collections.Counter()
+        self.callback_times = {}  # Interaction ID -> perf_counter when its response arrived
+        self.captured_messages = collections.defaultdict(collections.deque)  # Channel ID -> the bot's captured message IDs
+        self.app = web.Application()
+        self.app.router.add_route("*", "/api/v10/{path:.*}", self.handle)
+        self.runner = None
+        self.port = None
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}/api/v10"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def next_message_id(self, channel_id):
+        """Hand out the captured ID for the bot's next message in this channel, so recorded clicks on it route."""
+        if self.captured_messages[channel_id]:
+            return self.captured_messages[channel_id].popleft()
+        return None
+
+    async def handle(self, request):
+        path = "/" + request.match_info["path"]
+        route = _interaction_callback.sub("/interactions/{id}/{token}/callback", path)
+        self.requests[f"{request.method} {_numeric.sub('/{id}', route)}"] += 1
+
+        match = _interaction_callback.match(path)
+        if match:
+            self.callback_times.setdefault(match.group(1), time.perf_counter())
+            if request.query.get("with_response") == "true":
+                return _json({"interaction": {"id": match.group(1), "type": 2}})
+            return web.Response(status=204)
+        if path == "/users/@me":
+            return _json(_user(BOT_USER_ID))
+        if path == "/oauth2/applications/@me":
+            return _json({"id": BOT_USER_ID, "name": "replay", "description": "", "icon": None,
+                          "bot_public": True, "bot_require_code_grant": False, "owner": _user(BOT_USER_ID),
+                          "verify_key": "", "flags": 0})
+        parts = path.strip("/").split("/")
+        if parts[0] == "channels" and len(parts) >= 3 and parts[2] == "messages":
+            if request.method == "DELETE":
+                return web.Response(status=204)
+            if len(parts) > 3:
+                return _json(_message(parts[1], parts[3]))
+            return _json(_message(parts[1], self.next_message_id(parts[1])))
+        if parts[0] == "guilds" and len(parts) == 4 and parts[2] == "members":
+            return _json({"user": _user(parts[3], "member"), "roles": [], "joined_at": None,
+                                      "deaf": False, "mute": False, "flags": 0})
+        if parts[0] == "webhooks":
+            return _json(_message("0"))
+        return _json({})
+
+
+def read_capture(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _wait_for_view(state, message_id, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while message_id not in state._view_store._synced_message_views and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+
+
+async def replay(path, speed):
+    api = FakeDiscordAPI()
+    bot_messages = set()
+    for entry in read_capture(path):
+        if entry["t"] == "BOT_MESSAGE":
+            api.captured_messages[entry["d"]["channel_id"]].append(entry["d"]["id"])
+            bot_messages.add(int(entry["d"]["id"]))
+    base = await api.start()
+    # Point both the bot HTTP client and the interaction webhook adapter at the fake API
+    discord.http.Route.BASE = base
+    discord.webhook.async_.Route.BASE = base
+
+    intents = discord.Intents.default()
+    intents.members = True
+    bot = commands.Bot(command_prefix="!", intents=intents)
+    bot.rest = RestClient(bot)
+    bot.admission = AdmissionController(bot)
+    bot.tracer = Tracer(sample_rate=0)
+    await bot.login("replay-token")
+
+    for cog in REPLAY_COGS:
+        await bot.load_extension(cog)
+    # The module the bot loaded, not whatever an earlier plain import of cogs.setup left behind
+    setup_module = bot.extensions["cogs.setup"]
+
+    state = bot._connection
+    state._chunk_guilds = False
+    dispatched = 0
+    fed_at = {}
+    start = time.perf_counter()
+
+    for entry in read_capture(path):
+        if speed > 0:
+            delay = entry["ts"] / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        event, data = entry["t"], entry["d"]
+        if event == "BOT_MESSAGE":
+            continue  # Already queued on the fake API; the replayed bot sends its own
+        if event == "CAPTURE_CONFIG":
+            setup_module.request_channels.update(data["request_channels"])
+            config.rebuild()
+            continue
+        if event == "GUILD_SNAPSHOT":
+            event = "GUILD_CREATE"
+        if event == "GUILD_CREATE":
+            data["owner_id"] = BOT_USER_ID  # Gives the replay bot every permission it checks for
+            data.setdefault("members", []).append({"user": _user(BOT_USER_ID), "roles": [],
+                                                   "joined_at": None, "deaf": False, "mute": False, "flags": 0})
+        if event == "INTERACTION_CREATE":
+            message = data.get("message")
+            if message is not None:
+                message.setdefault("content", "")  # Dropped by the anonymizer but required by discord.py
+                if int(message["id"]) in bot_messages:
+                    # A click can't arrive before its message exists; wait for the replayed bot to send it
+                    await _wait_for_view(state, int(message["id"]))
+            fed_at[data["id"]] = time.perf_counter()
+
+        parser = state.parsers.get(event)
+        if parser is None:
+            continue
+        parser(data)
+        dispatched += 1
+        await asyncio.sleep(0)  # Let listeners scheduled by this dispatch start
+
+    # Give in-flight handlers a moment to finish their REST calls
+    await asyncio.sleep(1)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(
+        (api.callback_times[interaction_id] - t0) * 1000
+        for interaction_id, t0 in fed_at.items() if interaction_id in api.callback_times
+    )
+    await bot.close()
+    await api.stop()
+    return dispatched, elapsed, latencies, fed_at, api.requests
+
+
+def _percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a gateway capture against the cogs.")
+    parser.add_argument("capture", help="gzip'd JSON-lines file written by the capture cog")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier, 0 = unthrottled")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    capture = os.path.abspath(args.capture)
+    with tempfile.TemporaryDirectory() as workdir:
+        # The cogs persist state relative to the working directory; keep it away from real data
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            dispatched, elapsed, latencies, fed_at, requests = asyncio.run(replay(capture, args.speed))
+        finally:
+            os.chdir(cwd)
+
+    print(f"Replayed {dispatched} events in {elapsed:.2f}s ({dispatched / elapsed:.1f} events/s)")
+    if latencies:
+        print(f"Interactions answered: {len(latencies)}/{len(fed_at)}")
+        print(f"Latency ms: p50 {statistics.median(latencies):.2f}  p95 {_percentile(latencies, 95):.2f}  "
+              f"p99 {_percentile(latencies, 99):.2f}  max {latencies[-1]:.2f}")
+    print("Fake API calls:")
+    for route, count in requests.most_common():
+        print(f"  {count:>6}  {route}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,8 @@ from discord import app_commands
 import io
 import logging
 import base64
-import aiohttp
 import time
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+import config
 
 # Configure logging
 logging.basicConfig(
@@ -22,8 +17,8 @@ logging.basicConfig(
 class AvatarBannerUpdater(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.owner_ids = set(map(int, os.getenv('OWNER_IDS').split(',')))  # Load owner IDs from .env
-        self.guild_id = int(os.getenv('GUILD_ID'))  # Load guild ID from .env
+        self.owner_ids = config.settings.owner_ids  # Loaded once from .env by the config module
+        self.guild_id = config.settings.guild_id
         self.last_avatar_update = 0  # Track last avatar update time
         self.last_banner_update = 0  # Track last banner update time
         logging.info(f"AvatarBannerUpdater initialized with owner IDs: {self.owner_ids}")
@@ -41,16 +36,17 @@ class AvatarBannerUpdater(commands.Cog):
 
         # Cooldown check for avatar updates
         current_time = time.time()
-        if current_time - self.last_avatar_update < 60:  # 60 seconds cooldown
-            await interaction.response.send_message(f"Please wait {int(60 - (current_time - self.last_avatar_update))} more seconds before updating the avatar.", ephemeral=True)
+        cooldown = config.settings.profile_update_cooldown
+        if current_time - self.last_avatar_update < cooldown:
+            await interaction.response.send_message(f"Please wait {int(cooldown - (current_time - self.last_avatar_update))} more seconds before updating the avatar.", ephemeral=True)
             return
 
         if not image.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
             await interaction.response.send_message("Unsupported file type. Please upload an image in PNG, JPG, JPEG, GIF, or WEBP format.", ephemeral=True)
             return
 
-        if image.size > 8 * 1024 * 1024:  # 8 MB size limit
-            await interaction.response.send_message("File is too large. Please upload an image under 8 MB.", ephemeral=True)
+        if image.size > config.settings.max_image_bytes:
+            await interaction.response.send_message(f"File is too large. Please upload an image under {config.settings.max_image_bytes // (1024 * 1024)} MB.", ephemeral=True)
             return
 
         # Send an immediate response to acknowledge the command
@@ -78,16 +74,17 @@ class AvatarBannerUpdater(commands.Cog):
 
         # Cooldown check for banner updates
         current_time = time.time()
-        if current_time - self.last_banner_update < 60:  # 60 seconds cooldown
-            await interaction.response.send_message(f"Please wait {int(60 - (current_time - self.last_banner_update))} more seconds before updating the banner.", ephemeral=True)
+        cooldown = config.settings.profile_update_cooldown
+        if current_time - self.last_banner_update < cooldown:
+            await interaction.response.send_message(f"Please wait {int(cooldown - (current_time - self.last_banner_update))} more seconds before updating the banner.", ephemeral=True)
             return
 
         if not image.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
             await interaction.response.send_message("Unsupported file type. Please upload an image in PNG, JPG, JPEG, GIF, or WEBP format.", ephemeral=True)
             return
 
-        if image.size > 8 * 1024 * 1024:  # 8 MB size limit
-            await interaction.response.send_message("File is too large. Please upload an image under 8 MB.", ephemeral=True)
+        if image.size > config.settings.max_image_bytes:
+            await interaction.response.send_message(f"File is too large. Please upload an image under {config.settings.max_image_bytes // (1024 * 1024)} MB.", ephemeral=True)
             return
 
         # Send an immediate response to acknowledge the command
@@ -101,30 +98,14 @@ class AvatarBannerUpdater(commands.Cog):
                 'banner': f"data:image/gif;base64,{banner_base64}"
             }
 
-            # Prepare headers with bot token
-            bot_token = os.getenv("DISCORD_TOKEN")
-            if not bot_token:
-                raise ValueError("Bot token not found in environment variables")
-
-            headers = {
-                'Authorization': f'Bot {bot_token}',
-                'Content-Type': 'application/json'
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.patch('https://discord.com/api/v10/users/@me', headers=headers, json=payload) as response:
-                    response_text = await response.text()
-                    logging.debug(f"API Response: {response_text}")
-                    if response.status == 200:
-                        await interaction.followup.send("Bot banner updated successfully!")
-                        logging.info(f"Bot banner updated by user {interaction.user.name}")
-                        self.last_banner_update = current_time  # Update last banner update time
-                    else:
-                        await interaction.followup.send(f"Failed to update banner: {response_text}", ephemeral=True)
-                        logging.error(f"Failed to update banner: {response_text}")
-        except aiohttp.ClientError as e:
-            await interaction.followup.send(f"An error occurred: {e}", ephemeral=True)
-            logging.error(f"Error updating banner: {e}")
+            # Goes through the bot's pooled client so the call shares discord.py's rate limiter
+            await self.bot.rest.request('PATCH', '/users/@me', json=payload)
+            await interaction.followup.send("Bot banner updated successfully!")
+            logging.info(f"Bot banner updated by user {interaction.user.name}")
+            self.last_banner_update = current_time  # Update last banner update time
+        except discord.HTTPException as e:
+            await interaction.followup.send(f"Failed to update banner: {e}", ephemeral=True)
+            logging.error(f"Failed to update banner: {e}")
         except Exception as e:
             await interaction.followup.send(f"Unexpected error: {e}", ephemeral=True)
             logging.error(f"Unexpected error: {e}")
@@ -132,9 +113,9 @@ class AvatarBannerUpdater(commands.Cog):
 async def setup(bot):
     # Register commands only for a specific guild
     try:
-        guild = discord.Object(id=int(os.getenv('GUILD_ID')))
+        guild = discord.Object(id=config.settings.guild_id)
         await bot.add_cog(AvatarBannerUpdater(bot))
         await bot.tree.sync(guild=guild)  # Sync commands with the specific guild
-        logging.info(f"Slash commands synced for guild {os.getenv('GUILD_ID')}")
+        logging.info(f"Slash commands synced for guild {config.settings.guild_id}")
     except Exception as e:
         logging.error(f"Error adding cog or syncing commands: {e}")
@@ -0,0 +1,208 @@
+import discord
+from discord.ext import commands, tasks
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+import config
+from .setup import request_channels
+
+logger = logging.getLogger(__name__)
+
+# Dispatches needed to rebuild guild state and reproduce the traffic the cogs react to
+CAPTURED_EVENTS = {
+    "GUILD_CREATE",
+    "GUILD_DELETE",
+    "CHANNEL_CREATE",
+    "CHANNEL_DELETE",
+    "GUILD_MEMBER_UPDATE",
+    "VOICE_STATE_UPDATE",
+    "INTERACTION_CREATE",
+}
+# Free-text fields replaced with stable placeholders
+NAME_KEYS = {"username", "global_name", "nick", "name", "topic", "display_name", "filename"}
+# Attachment links, replaced with a placeholder URL since discord.py requires them
+URL_KEYS = {"url", "proxy_url"}
+# Image hashes, nulled rather than dropped since discord.py requires some of them (user avatar)
+IMAGE_KEYS = {"avatar", "banner", "avatar_decoration_data", "icon", "splash", "discovery_splash"}
+# Fields dropped entirely
+DROP_KEYS = {"email", "content", "description", "locale", "guild_locale", "rtc_region", "vanity_url_code"}
+SECRET_KEYS = {"token", "session_id"}
+
+
+def _is_snowflake(value):
+    return value.isdigit() and 15 <= len(value) <= 20
+
+
+class Anonymizer:
+    """Rewrites a gateway payload so it can be shared without identifying anyone.
+
+    Snowflakes are mapped through a keyed hash, so the same user or channel keeps the same
+    (fake) ID across the whole capture while the key itself is never written out.
+    """
+
+    def __init__(self):
+        self.key = secrets.token_bytes(32)
+
+    def _digest(self, value):
+        return hmac.new(self.key, str(value).encode(), hashlib.sha256).digest()
+
+    def snowflake(self, value):
+        # Keep IDs in snowflake range so they still parse as 64-bit ints downstream
+        return str(int.from_bytes(self._digest(value)[:8], "big") >> 2 | 1 << 60)
+
+    def placeholder(self, key, value):
+        return f"{key}-{self._digest(value)[:4].hex()}"
+
+    def scrub(self, value, key=None):
+        if key in IMAGE_KEYS:
+            return None
+        if isinstance(value, dict):
+            # Keys are hashed too: interaction "resolved" data is keyed by user, role and channel IDs
+            return {self.snowflake(k) if _is_snowflake(k) else k: self.scrub(v, k)
+                    for k, v in value.items() if k not in DROP_KEYS}
+        if isinstance(value, list):
+            return [self.scrub(item, key) for item in value]
+        if isinstance(value, str):
+            if key in SECRET_KEYS:
+                return secrets.token_urlsafe(24)
+            if _is_snowflake(value):
+                return self.snowflake(value)
+            if key in URL_KEYS:
+                return f"https://example.invalid/{self.placeholder(key, value)}"
+            if key in NAME_KEYS:
+                return self.placeholder(key, value)
+        return value
+
+    def scrub_interaction(self, data):
+        """Like ``scrub`` but keeps command, option and component names so the replay can route it."""
+        command = data.get("data")
+        scrubbed = self.scrub({k: v for k, v in data.items() if k != "data"})
+        if command is not None:
+            scrubbed["data"] = {
+                **self.scrub({k: v for k, v in command.items() if k not in ("name", "options", "custom_id")}),
+                **{k: command[k] for k in ("name", "custom_id", "component_type", "type") if k in command},
+                "options": [self._scrub_option(option) for option in command.get("options", [])],
+            }
+        return scrubbed
+
+    def _scrub_option(self, option):
+        scrubbed = {k: option[k] for k in ("name", "type", "focused") if k in option}
+        if "options" in option:
+            scrubbed["options"] = [self._scrub_option(child) for child in option["options"]]
+        if "value" in option:
+            value = option["value"]
+            if isinstance(value, str) and not _is_snowflake(value):
+                value = self.placeholder("value", value) if value else value
+            scrubbed["value"] = self.scrub(value)
+        return scrubbed
+
+
+class CaptureCog(commands.Cog):
+    """Records gateway dispatches to a gzip'd JSON-lines file when CAPTURE_FILE is set.
+
+    Messages the bot sends itself are reduced to their IDs (``BOT_MESSAGE``) so the replay can
+    match button clicks to them. Needs the bot to be created with ``enable_debug_events=True``.
+    Replay the file with ``python -m benchmarks.replay``.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.path = config.settings.capture_file
+        # Kept on the bot so IDs and timestamps stay consistent when the cog is reloaded mid-capture
+        if not hasattr(bot, "capture_state"):
+            bot.capture_state = {"anonymizer": Anonymizer(), "started": time.monotonic()}
+        self.anonymizer = bot.capture_state["anonymizer"]
+        self.buffer = []
+        self.started = bot.capture_state["started"]
+        self.events = 0
+        if self.path:
+            # Let the replay know which (anonymized) channels accept /dragmee
+            self.record("CAPTURE_CONFIG", {"request_channels": {
+                self.anonymizer.snowflake(guild_id): self.anonymizer.snowflake(channel_id)
+                for guild_id, channel_id in request_channels.items()
+            }})
+            if bot.is_ready():
+                # The initial GUILD_CREATEs are already gone; capture the cached state instead
+                for guild in bot.guilds:
+                    self.record("GUILD_SNAPSHOT", self.anonymizer.scrub(self._guild_payload(guild)))
+            self.flush_loop.start()
+            logger.info(f"Capturing gateway events to {self.path}")
+
+    def cog_unload(self):
+        if self.path:
+            self.flush_loop.cancel()
+            self.flush()
+
+    @staticmethod
+    def _guild_payload(guild):
+        """Minimal GUILD_CREATE-shaped payload rebuilt from the cache."""
+        channels = [{"id": str(c.id), "type": c.type.value, "name": c.name, "position": c.position,
+                     "permission_overwrites": [], "bitrate": getattr(c, "bitrate", 64000),
+                     "user_limit": getattr(c, "user_limit", 0)} for c in guild.channels]
+        voice_states = []
+        members = []
+        for channel in guild.voice_channels + guild.stage_channels:
+            for member in channel.members:
+                voice_states.append({"user_id": str(member.id), "channel_id": str(channel.id),
+                                     "session_id": "", "deaf": False, "mute": False, "self_deaf": False,
+                                     "self_mute": False, "suppress": False})
+                members.append({"user": {"id": str(member.id), "username": member.name,
+                                         "discriminator": "0", "bot": member.bot, "avatar": None},
+                                "roles": [], "joined_at": None, "deaf": False, "mute": False, "flags": 0})
+        return {"id": str(guild.id), "name": guild.name, "owner_id": str(guild.owner_id),
+                "member_count": guild.member_count, "channels": channels, "roles": [],
+                "members": members, "voice_states": voice_states, "threads": [],
+                "emojis": [], "stickers": [], "features": [], "large": False}
+
+    def _sent_by_bot(self, message):
+        """Whether the bot posted this message to a channel itself, rather than as an interaction response."""
+        return (self.bot.user is not None and message["author"]["id"] == str(self.bot.user.id)
+                and "interaction_metadata" not in message and "interaction" not in message)
+
+    def record(self, event, data):
+        self.buffer.append(json.dumps({"ts": round(time.monotonic() - self.started, 4), "t": event, "d": data}))
+        self.events += 1
+
+    @commands.Cog.listener()
+    async def on_socket_raw_receive(self, msg):
+        if not self.path:
+            return
+        try:
+            payload = json.loads(msg)
+        except (TypeError, ValueError):
+            return
+        if payload.get("op") != 0:
+            return
+        if payload.get("t") == "MESSAGE_CREATE" and self._sent_by_bot(payload["d"]):
+            # The replay hands these IDs back when the bot sends, so captured button clicks find their message
+            self.record("BOT_MESSAGE", {"id": self.anonymizer.snowflake(payload["d"]["id"]),
+                                        "channel_id": self.anonymizer.snowflake(payload["d"]["channel_id"])})
+            return
+        if payload.get("t") not in CAPTURED_EVENTS:
+            return
+        if payload["t"] == "INTERACTION_CREATE":
+            self.record(payload["t"], self.anonymizer.scrub_interaction(payload["d"]))
+        else:
+            self.record(payload["t"], self.anonymizer.scrub(payload["d"]))
+
+    def flush(self):
+        if not self.buffer:
+            return
+        lines, self.buffer = self.buffer, []
+        try:
+            # Each flush appends a new gzip member; readers see one continuous stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write capture file: {e}")
+
+    @tasks.loop(seconds=5)
+    async def flush_loop(self):
+        self.flush()
+
+async def setup(bot):
+    await bot.add_cog(CaptureCog(bot))
@@ -0,0 +1,152 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import collections
+import gc
+import io
+import logging
+import sys
+import tracemalloc
+
+import config
+import keep_alive
+
+logger = logging.getLogger(__name__)
+
+TRACEMALLOC_FRAMES = 10  # Stack depth recorded per allocation once tracing is on
+LARGE_BUFFER = 1024 * 1024  # BytesIO objects at least this big are listed individually
+MAX_SNAPSHOTS = 2  # Only the latest pair is needed for a diff
+
+_snapshots = collections.deque(maxlen=MAX_SNAPSHOTS)
+
+
+def take_snapshot():
+    """Start tracing if needed and keep a snapshot for later diffs."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        return {"tracing": "started", "note": "Tracing was off; take another snapshot later to diff."}
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    _snapshots.append(snapshot)
+    current, peak = tracemalloc.get_traced_memory()
+    return {"snapshots": len(_snapshots), "traced_bytes": current, "peak_bytes": peak}
+
+
+def diff_snapshots(limit=10):
+    """Top allocation sites by growth between the last two snapshots."""
+    if len(_snapshots) < 2:
+        return {"error": "Need two snapshots to diff."}
+    older, newer = _snapshots
+    stats = newer.compare_to(older, "lineno")[:limit]
+    return {"diff": [str(stat) for stat in stats]}
+
+
+def top_allocators(limit=10):
+    """Current top allocation sites, without keeping the snapshot around."""
+    if not tracemalloc.is_tracing():
+        return {"error": "Tracing is off; take a snapshot first."}
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    return {"top": [str(stat) for stat in stats]}
+
+
+def stop_tracing():
+    tracemalloc.stop()
+    _snapshots.clear()
+    return {"tracing": "stopped"}
+
+
+def census(bot, limit=10):
+    """Count objects that tend to leak: Views, pending requests, cached members and big buffers."""
+    from . import dragme  # Imported lazily so diagnostics can load without the dragme cog
+    from .waitlist import waitlist
+
+    views = collections.Counter()
+    buffers = []
+    for obj in gc.get_objects():
+        if isinstance(obj, discord.ui.View):
+            views[type(obj).__name__] += 1
+        elif isinstance(obj, io.BytesIO):
+            size = sys.getsizeof(obj)
+            if size >= LARGE_BUFFER:
+                buffers.append(size)
+
+    members = sorted(((len(guild.members), guild.id, guild.name) for guild in bot.guilds), reverse=True)
+    return {
+        "live_views": dict(views),
+        "pending_requests": len(dragme.pending_requests),
+        "unfinished_views": sum(1 for view in dragme.pending_requests.values() if not view.is_finished()),
+        "waitlisted": len(waitlist.members),
+        "cached_members": sum(count for count, _, _ in members),
+        # Keyed by ID, since guild names are not unique
+        "members_per_guild": {str(guild_id): {"name": name, "members": count}
+                              for count, guild_id, name in members[:limit]},
+        "large_buffers": {"count": len(buffers), "bytes": sum(buffers)},
+        "gc_counts": gc.get_count(),
+        "admission": {**bot.admission.signals(), "level": bot.admission.level()},
+    }
+
+
+def format_report(report):
+    lines = []
+    for key, value in report.items():
+        if isinstance(value, list):
+            lines.append(f"{key}:")
+            lines.extend(f"  {item}" for item in value)
+        elif isinstance(value, dict):
+            lines.append(f"{key}:")
+            lines.extend(f"  {k}: {v}" for k, v in value.items())
+        else:
+            lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        keep_alive.register_diagnostics(self.run_from_thread)
+
+    def cog_unload(self):
+        keep_alive.register_diagnostics(None)
+
+    def run(self, action, limit=10):
+        """Run one diagnostics action on the event loop thread."""
+        if action == "census":
+            return census(self.bot, limit)
+        if action == "snapshot":
+            return take_snapshot()
+        if action == "diff":
+            return diff_snapshots(limit)
+        if action == "top":
+            return top_allocators(limit)
+        if action == "stop":
+            return stop_tracing()
+        return {"error": f"Unknown action {action!r}"}
+
+    def run_from_thread(self, action, limit=10):
+        """Entry point for the health server, which runs on its own thread."""
+        async def call():
+            return self.run(action, limit)
+        return asyncio.run_coroutine_threadsafe(call(), self.bot.loop).result(timeout=30)
+
+    @app_commands.command(name="diagnostics", description="Owner only: inspect the bot's memory usage.")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Object census", value="census"),
+        app_commands.Choice(name="Take tracemalloc snapshot", value="snapshot"),
+        app_commands.Choice(name="Diff last two snapshots", value="diff"),
+        app_commands.Choice(name="Top allocators", value="top"),
+        app_commands.Choice(name="Stop tracing", value="stop"),
+    ])
+    async def diagnostics(self, interaction: discord.Interaction, action: str, limit: int = 10):
+        if interaction.user.id not in config.settings.owner_ids:
+            await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+            return
+
+        report = format_report(self.run(action, max(1, min(limit, 25))))
+        logger.info(f"Diagnostics '{action}' requested by {interaction.user.name}")
+        await interaction.response.send_message(f"```\n{report[:1900]}\n```", ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
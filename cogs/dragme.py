@@ -1,7 +1,14 @@
 import discord
 from discord.ext import commands
+import asyncio
+import json
 import logging
-from .setup import request_channels  # Import request_channels from the setup file
+import os
+import time
+import config  # Per-guild settings, read from config.snapshot
+from admission import PRIORITY_NORMAL
+from .voice_index import voice_index  # Members currently in voice, kept current by events
+from .waitlist import waitlist  # Accepted requests waiting for a slot in a full channel
 
 logger = logging.getLogger(__name__)
 
@@ -9,59 +16,283 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger('discord').setLevel(logging.WARNING)
 
-TIMEOUT_DURATION = 30  # Set timeout duration
+COOLDOWN_PRUNE_SIZE = 10000  # Expired cooldown entries are swept once this many are stored
+
+HANDOFF_FILE = "handoff.json"  # Open requests and the waitlist, written on shutdown and resumed by the next process
+
+# Open requests by request message ID, so they can be inspected and never silently leak
+pending_requests = {}
+
+def save_handoff(views, waiting):
+    """Write open requests and waitlist entries for the next process, swapping the file in atomically."""
+    try:
+        with open(HANDOFF_FILE + ".tmp", "w") as f:
+            json.dump({
+                "requests": [view.to_handoff() for view in views],
+                "waitlist": [entry.to_handoff() for entry in waiting],
+            }, f, indent=4)
+        os.replace(HANDOFF_FILE + ".tmp", HANDOFF_FILE)
+        logger.info(f"Handed off {len(views)} open drag request(s) and {len(waiting)} waitlisted member(s).")
+    except IOError as e:
+        logger.error(f"Failed to write {HANDOFF_FILE}: {e}")
+
+def load_handoff():
+    """Read and remove the handoff file, so each request is resumed by exactly one process."""
+    if not os.path.exists(HANDOFF_FILE):
+        return {}
+    try:
+        with open(HANDOFF_FILE, "r") as f:
+            handoff = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        logger.warning(f"{HANDOFF_FILE} could not be read, open requests from the last run are lost: {e}")
+        handoff = {}
+    os.remove(HANDOFF_FILE)
+    if isinstance(handoff, list):  # Written by a version without the waitlist
+        handoff = {"requests": handoff}
+    return handoff
 
 class DragmeButtons(discord.ui.View):
-    def __init__(self, target_user, interaction_user, target_voice_channel, request_message=None):
-        super().__init__(timeout=TIMEOUT_DURATION)  # Initialize the parent class (View) with a timeout
+    def __init__(self, target_user, interaction_user, target_voice_channel, request_message=None, bot=None,
+                 timeout=config.DEFAULT_GUILD_CONFIG.request_timeout):
+        # The View itself never times out and its buttons have fixed IDs, so it can be registered
+        # again after a restart; the request deadline is tracked here instead
+        super().__init__(timeout=None)
         self.target_user = target_user
         self.interaction_user = interaction_user
         self.target_voice_channel = target_voice_channel
         self.request_message = request_message  # Optional, can be None if not needed
+        self.bot = bot  # Used for admission control and request lifecycle events
+        self.finished = False
+        self.trace_context = None  # Links button clicks to the /dragmee trace, None if unsampled
+        self.deadline = time.time() + timeout  # Wall clock, so it still means the same thing in the next process
+        self._expiry = asyncio.get_running_loop().call_later(timeout, self._expire)
+        self._timeout_task = None
+
+    def _expire(self):
+        if not self.finished:
+            self._timeout_task = asyncio.create_task(self.on_timeout())
+
+    def finish(self, outcome):
+        """Mark the request as done ("accepted", "waitlisted", "rejected", "failed" or "timed_out") exactly once."""
+        if self.finished:
+            return
+        self.finished = True
+        self._expiry.cancel()
+        self.stop()
+        if self.request_message:
+            pending_requests.pop(self.request_message.id, None)
+        self.bot.dispatch("drag_request_finished", self, outcome)
+
+    def detach(self):
+        """Stop handling clicks without resolving the request, so another process can take it over."""
+        self._expiry.cancel()
+        self.stop()
 
-    @discord.ui.button(label="Accept", style=discord.ButtonStyle.green)
+    def to_handoff(self):
+        return {
+            "message_id": self.request_message.id,
+            "channel_id": self.request_message.channel.id,
+            "guild_id": self.target_voice_channel.guild.id,
+            "requester_id": self.interaction_user.id,
+            "target_id": self.target_user.id,
+            "voice_channel_id": self.target_voice_channel.id,
+            "deadline": self.deadline,
+            "trace_context": self.trace_context,
+        }
+
+    @discord.ui.button(label="Accept", style=discord.ButtonStyle.green, custom_id="dragme:accept")
     async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle the accept button click."""
         if interaction.user != self.target_user:
             await interaction.response.send_message("You are not authorized to accept this request.", ephemeral=True)
             return
 
-        try:
-            # Move the user to the target voice channel
-            await self.interaction_user.move_to(self.target_voice_channel)
-            await interaction.response.send_message(f"{self.interaction_user.mention} has been moved to {self.target_voice_channel.name}.")
-        except Exception as e:
-            logger.error(f"Error moving {self.interaction_user} to {self.target_voice_channel}: {e}")
-            await interaction.response.send_message("There was an error moving the user to the voice channel.")
-
-        # Optionally delete the request message after accepting
-        if self.request_message:
-            await self.request_message.delete()
+        tracer = self.bot.tracer
+        with tracer.continue_trace("accept_button", self.trace_context, interaction_id=interaction.id):
+            if waitlist.is_full(self.target_voice_channel):
+                # move_to would fail; queue the move until someone leaves the channel
+                with tracer.span("waitlist.add", channel_id=self.target_voice_channel.id):
+                    await self.join_waitlist(interaction)
+            else:
+                try:
+                    # Move the user to the target voice channel
+                    with tracer.span("move_to", channel_id=self.target_voice_channel.id):
+                        async with self.bot.admission.track_move():
+                            await self.interaction_user.move_to(self.target_voice_channel)
+                    with tracer.span("interaction.response.send_message"):
+                        await interaction.response.send_message(f"{self.interaction_user.mention} has been moved to {self.target_voice_channel.name}.")
+                    self.finish("accepted")
+                except Exception as e:
+                    logger.error(f"Error moving {self.interaction_user} to {self.target_voice_channel}: {e}")
+                    await interaction.response.send_message("There was an error moving the user to the voice channel.")
+                    self.finish("failed")
+
+            # Optionally delete the request message after accepting; cleanup waits out API pressure
+            if self.request_message:
+                with tracer.span("request_message.delete"):
+                    await self.bot.admission.run_low_priority(self.request_message.delete, "request cleanup")
+
+    async def join_waitlist(self, interaction):
+        channel = self.target_voice_channel
+        position = waitlist.add(self.interaction_user.id, channel, self.trace_context)
+        if position is None:
+            await interaction.response.send_message(f"{channel.name} is full and so is its waitlist. Please try again later.")
+            self.finish("failed")
+            return
+        await interaction.response.send_message(
+            f"{channel.name} is full. {self.interaction_user.mention} is #{position} on the waitlist "
+            f"and will be moved in as soon as a spot opens up."
+        )
+        self.finish("waitlisted")
 
-    @discord.ui.button(label="Reject", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="Reject", style=discord.ButtonStyle.red, custom_id="dragme:reject")
     async def reject_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle the reject button click."""
         if interaction.user != self.target_user:
             await interaction.response.send_message("You are not authorized to reject this request.", ephemeral=True)
             return
 
-        await interaction.response.send_message(f"{self.interaction_user.mention}'s request has been rejected.")
+        tracer = self.bot.tracer
+        with tracer.continue_trace("reject_button", self.trace_context, interaction_id=interaction.id):
+            with tracer.span("interaction.response.send_message"):
+                await interaction.response.send_message(f"{self.interaction_user.mention}'s request has been rejected.")
+            self.finish("rejected")
 
-        # Optionally delete the request message after rejecting
-        if self.request_message:
-            await self.request_message.delete()
+            # Optionally delete the request message after rejecting
+            if self.request_message:
+                with tracer.span("request_message.delete"):
+                    await self.bot.admission.run_low_priority(self.request_message.delete, "request cleanup")
 
     async def on_timeout(self):
         """Handle the timeout for the view."""
-        if self.request_message:
-            await self.request_message.edit(content="This request has timed out.", view=None)
+        with self.bot.tracer.continue_trace("timeout", self.trace_context):
+            self.finish("timed_out")
+            if self.request_message:
+                await self.bot.admission.run_low_priority(
+                    lambda: self.request_message.edit(content="This request has timed out.", view=None),
+                    "timeout cleanup"
+                )
 
 
 class DragmeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.cooldowns = {}  # Member ID -> time of their last accepted /dragmee
+        # The voice index is rebuilt whenever its cog reloads; hand the live one to the waitlist.
+        # Its listener is registered before ours, so occupancy is current when we read it
+        waitlist.index = voice_index
         logger.info("DragmeCog initialized.")
 
+    async def cog_load(self):
+        # Cogs are loaded once the bot is ready, so members and channels are cached by now
+        if self.bot.is_ready():
+            await self.resume_requests()
+
+    def cog_unload(self):
+        # Runs on shutdown and on reload; open requests are handed over rather than dropped
+        views = [view for view in pending_requests.values() if not view.finished and view.request_message]
+        for view in views:
+            view.detach()
+        pending_requests.clear()
+        waiting = waitlist.live_entries()
+        waitlist.clear()
+        if views or waiting:
+            save_handoff(views, waiting)
+
+    async def resume_requests(self):
+        """Re-attach the buttons of requests handed over by the previous process."""
+        now = time.time()
+        resumed = 0
+        handoff = load_handoff()
+        for entry in handoff.get("requests", ()):
+            guild = self.bot.get_guild(entry["guild_id"])
+            channel = guild.get_channel(entry["channel_id"]) if guild else None
+            if channel is None:
+                continue
+            request_message = channel.get_partial_message(entry["message_id"])
+            requester = guild.get_member(entry["requester_id"])
+            target = guild.get_member(entry["target_id"])
+            voice_channel = guild.get_channel(entry["voice_channel_id"])
+            remaining = entry["deadline"] - now
+            if requester is None or target is None or voice_channel is None or remaining <= 0:
+                # Expired during the restart, or someone left; close it the way a timeout would
+                await self.bot.admission.run_low_priority(
+                    lambda message=request_message: self._expire_message(message), "timeout cleanup"
+                )
+                continue
+
+            view = DragmeButtons(target, requester, voice_channel, request_message=request_message, bot=self.bot,
+                                 timeout=remaining)
+            view.trace_context = tuple(entry["trace_context"]) if entry.get("trace_context") else None
+            self.bot.add_view(view, message_id=request_message.id)
+            pending_requests[request_message.id] = view
+            self.bot.dispatch("drag_request_created", view)
+            resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} drag request(s) from the previous process.")
+
+        channels = {}
+        for entry in handoff.get("waitlist", ()):
+            guild = self.bot.get_guild(entry["guild_id"])
+            channel = guild.get_channel(entry["channel_id"]) if guild else None
+            if channel is None or entry["deadline"] <= now:
+                continue
+            trace_context = tuple(entry["trace_context"]) if entry.get("trace_context") else None
+            waitlist.add(entry["member_id"], channel, trace_context, deadline=entry["deadline"])
+            channels[channel.id] = channel
+        # Slots may have opened while the bot was restarting
+        for channel in channels.values():
+            await self.drain_waitlist(channel)
+
+    async def drain_waitlist(self, channel):
+        """Move waiting members into ``channel`` in FIFO order while it has free slots."""
+        while True:
+            entry = waitlist.pop_ready(channel)
+            if entry is None:
+                return
+            member = channel.guild.get_member(entry.member_id)
+            if member is None or member.voice is None or member.voice.channel == channel:
+                waitlist.arrived(entry.member_id, channel.id)  # Left, or already got in on their own
+                continue
+            with self.bot.tracer.continue_trace("waitlist_move", entry.trace_context, channel_id=channel.id):
+                try:
+                    async with self.bot.admission.track_move():
+                        await member.move_to(channel)
+                except Exception as e:
+                    waitlist.arrived(entry.member_id, channel.id)
+                    logger.error(f"Error moving waitlisted {member} to {channel}: {e}")
+                    continue
+            self.bot.dispatch("drag_waitlist_moved", member, channel)
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if before.channel == after.channel:
+            return
+        if after.channel is not None:
+            waitlist.arrived(member.id, after.channel.id)
+        else:
+            waitlist.discard(member.id)  # Left voice, there is nobody to move any more
+        # Only channels with someone waiting are looked at, so most events stop here
+        if before.channel is not None and before.channel.id in waitlist.channels:
+            await self.drain_waitlist(before.channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        # A raised user limit frees slots just like someone leaving
+        if after.id in waitlist.channels and getattr(after, "user_limit", 0) != getattr(before, "user_limit", 0):
+            await self.drain_waitlist(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        waitlist.drop_channel(channel.id)
+
+    @staticmethod
+    async def _expire_message(message):
+        try:
+            await message.edit(content="This request has timed out.", view=None)
+        except discord.HTTPException as e:
+            logger.warning(f"Could not close handed-off request {message.id}: {e}")
+
     async def check_permissions(self, interaction):
         """Check if the bot has necessary permissions to move users."""
         if not interaction.guild.me.guild_permissions.move_members or not interaction.guild.me.guild_permissions.connect:
@@ -72,24 +303,56 @@ class DragmeCog(commands.Cog):
             return False
         return True
 
-    @commands.cooldown(1, 60, commands.BucketType.user)  # 1 use per 60 seconds per user
     @discord.app_commands.command(name="dragmee", description="Request to be dragged into a user's voice channel.")
-    async def dragme(self, interaction: discord.Interaction, target_user: discord.Member):
+    @discord.app_commands.describe(target_user="Member whose voice channel you want to join")
+    async def dragme(self, interaction: discord.Interaction, target_user: str):
         """Command to request to join a target user's voice channel."""
+        with self.bot.tracer.start_trace("dragmee", guild_id=interaction.guild.id, interaction_id=interaction.id) as root:
+            await self.handle_dragme(interaction, target_user, root)
+
+    async def handle_dragme(self, interaction, target_user, root):
+        """Body of /dragmee, run inside the request's root span."""
+        tracer = self.bot.tracer
         logger.debug(f"Interaction channel ID: {interaction.channel.id}")
-        request_channel_id = request_channels.get(str(interaction.guild.id))
+        guild_config = config.snapshot.get(interaction.guild.id)
 
         # Check if the interaction is in the correct channel
-        if request_channel_id is None or interaction.channel.id != int(request_channel_id):
+        if interaction.channel.id not in guild_config.request_channel_ids:
             await interaction.response.send_message(
                 "This command can only be used in the designated drag-requests channel.",
                 ephemeral=True
             )
             return
 
+        if guild_config.allowed_role_ids and not any(role.id in guild_config.allowed_role_ids for role in interaction.user.roles):
+            await interaction.response.send_message(
+                "You do not have a role that is allowed to use this command.",
+                ephemeral=True
+            )
+            return
+
+        now = time.monotonic()
+        retry_after = self.cooldowns.get(interaction.user.id, -guild_config.dragme_cooldown) + guild_config.dragme_cooldown - now
+        if retry_after > 0:
+            await interaction.response.send_message(
+                f"Please wait {retry_after:.2f} seconds before using this command again.",
+                ephemeral=True
+            )
+            return
+
         if not await self.check_permissions(interaction):
             return
 
+        # Shed new requests while Discord or the bot is struggling, so accepted moves stay fast
+        admitted, retry_after = self.bot.admission.check(PRIORITY_NORMAL)
+        if not admitted:
+            reason = "restarting" if self.bot.admission.draining else "under heavy load right now"
+            await interaction.response.send_message(
+                f"The bot is {reason}. Please try again in {retry_after} seconds.",
+                ephemeral=True
+            )
+            return
+
         if interaction.user.voice is None:
             await interaction.response.send_message(
                 f"{interaction.user.mention}, you must be in a voice channel to use this command.",
@@ -97,6 +360,14 @@ class DragmeCog(commands.Cog):
             )
             return
 
+        target_user = self.resolve_target(interaction.guild, target_user)
+        if target_user is None:
+            await interaction.response.send_message(
+                "Could not find that member. Pick someone from the suggestions.",
+                ephemeral=True
+            )
+            return
+
         if target_user.voice is None:
             await interaction.response.send_message(
                 f"{target_user.mention} is not in a voice channel.",
@@ -113,32 +384,65 @@ class DragmeCog(commands.Cog):
             )
             return
 
-        await interaction.response.send_message(
-            f"Request to join {target_user.mention}'s voice channel has been sent.",
-            ephemeral=True
-        )
+        with tracer.span("interaction.response.send_message"):
+            await interaction.response.send_message(
+                f"Request to join {target_user.mention}'s voice channel has been sent.",
+                ephemeral=True
+            )
 
         # Create and send the request message with buttons
-        view = DragmeButtons(target_user, interaction.user, target_voice_channel)
-        request_message = await interaction.channel.send(
-            f"{target_user.mention}, {interaction.user.mention} wants to join your voice channel.",
-            view=view
-        )
+        self.start_cooldown(interaction.user.id, now, guild_config.dragme_cooldown)
+        view = DragmeButtons(target_user, interaction.user, target_voice_channel, bot=self.bot,
+                             timeout=guild_config.request_timeout)
+        view.trace_context = root.context
+        try:
+            with tracer.span("channel.send"):
+                request_message = await interaction.channel.send(
+                    f"{target_user.mention}, {interaction.user.mention} wants to join your voice channel.",
+                    view=view
+                )
+        except Exception:
+            # The request never existed; disarm its timeout so it isn't reported as finished
+            view.detach()
+            raise
 
         # Optionally update the view with the request message
         view.request_message = request_message
+        pending_requests[request_message.id] = view
+        self.bot.dispatch("drag_request_created", view)
+
+    def start_cooldown(self, user_id, now, cooldown):
+        self.cooldowns[user_id] = now
+        if len(self.cooldowns) > COOLDOWN_PRUNE_SIZE:
+            self.cooldowns = {uid: ts for uid, ts in self.cooldowns.items() if now - ts < cooldown}
+
+    def resolve_target(self, guild, value):
+        """Turn the autocomplete value (a member ID) or an exactly typed display name into a Member.
+
+        Fuzzy matches are only offered as suggestions; resolving them here would ping whoever
+        happened to match.
+        """
+        if value.isdigit():
+            return guild.get_member(int(value))
+        matches = voice_index.exact(guild.id, value)
+        return guild.get_member(matches[0]) if len(matches) == 1 else None
+
+    @dragme.autocomplete("target_user")
+    async def target_user_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest members who are in voice right now, straight from the index."""
+        index = voice_index.guilds.get(interaction.guild.id)
+        if index is None:
+            return []
+        return [
+            discord.app_commands.Choice(name=index.members[member_id][1][:100], value=str(member_id))
+            for member_id in index.search(current, exclude=interaction.user.id)
+        ]
 
     @dragme.error
     async def dragme_error(self, interaction: discord.Interaction, error: Exception):
-        """Handle errors for the dragme command, including cooldowns."""
-        if isinstance(error, commands.CommandOnCooldown):
-            await interaction.response.send_message(
-                f"Please wait {error.retry_after:.2f} seconds before using this command again.",
-                ephemeral=True
-            )
-        else:
-            logger.error(f"An error occurred: {error}")
-            await interaction.response.send_message("An unexpected error occurred. Please try again later.", ephemeral=True)
+        """Handle unexpected errors for the dragme command; cooldowns are checked in the command."""
+        logger.error(f"An error occurred: {error}")
+        await interaction.response.send_message("An unexpected error occurred. Please try again later.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(DragmeCog(bot))
@@ -1,8 +1,10 @@
 import discord
 from discord.ext import commands
+import asyncio
 import os
 import json
 import logging
+import config
 
 # Setup logger for debugging and information logs
 logger = logging.getLogger(__name__)
@@ -11,40 +13,129 @@ logging.basicConfig(level=logging.INFO)
 # Global dictionary to store request channels by guild ID
 request_channels = {}
 
+# Channel creations in progress by guild ID, so concurrent /setup calls share one result
+_inflight = {}
+
+PROVISION_CONCURRENCY = 5  # Guilds set up at once by /setupall
+
 def load_request_channels():
-    global request_channels
+    # Updated in place so modules that imported request_channels keep seeing the live data
+    request_channels.clear()
     # Check if the file exists
     if os.path.exists("request_channels.json"):
         with open("request_channels.json", "r") as f:
             try:
-                request_channels = json.load(f)  # Load the request channels data
+                request_channels.update(json.load(f))  # Load the request channels data
                 logger.info("Loaded request channels: %s", request_channels)
             except json.JSONDecodeError:
                 logger.warning("request_channels.json is empty or invalid. Initializing as an empty JSON object.")
-                request_channels = {}  # Initialize as an empty dictionary if file is invalid
     else:
         logger.info("No existing request_channels.json found. Initializing as an empty JSON object.")
-        request_channels = {}  # Initialize as an empty dictionary if the file doesn't exist
+    config.rebuild(request_channels)
 
 def save_request_channels():
-    global request_channels
-    # Save the request channels data to the file
+    # Save the request channels data to a temp file and swap it in, so readers never see half a file
     try:
-        with open("request_channels.json", "w") as f:
+        with open("request_channels.json.tmp", "w") as f:
             json.dump(request_channels, f, indent=4)
+        os.replace("request_channels.json.tmp", "request_channels.json")
         logger.info("Saved request channels: %s", request_channels)
     except IOError as e:
         logger.error("Failed to save request channels: %s", e)
+    config.rebuild()  # Publish the change to handlers reading the config snapshot
+
+async def _create_request_channel(guild):
+    request_channel = await guild.create_text_channel("drag-requests")
+    request_channels[str(guild.id)] = str(request_channel.id)  # Save as string
+    save_request_channels()  # Save the new request channel data
+    return request_channel
+
+async def ensure_request_channel(guild):
+    """Return ``(channel, created)``, creating the guild's request channel at most once.
+
+    Callers that arrive while a creation is already running wait for that same creation
+    instead of starting another one.
+    """
+    guild_id = str(guild.id)
+    existing_channel_id = request_channels.get(guild_id)
+    if existing_channel_id is not None:
+        existing_channel = guild.get_channel(int(existing_channel_id))
+        if existing_channel:
+            return existing_channel, False
+
+    task = _inflight.get(guild_id)
+    if task is not None:
+        # Shielded so one caller giving up doesn't cancel the creation for everyone else
+        return await asyncio.shield(task), False
+
+    task = _inflight[guild_id] = asyncio.ensure_future(_create_request_channel(guild))
+    try:
+        return await asyncio.shield(task), True
+    finally:
+        if task.done():
+            _inflight.pop(guild_id, None)
+        else:
+            task.add_done_callback(lambda _: _inflight.pop(guild_id, None))
+
+async def provision_guilds(guilds, concurrency=PROVISION_CONCURRENCY):
+    """Ensure a request channel in many guilds, with at most ``concurrency`` creations at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def provision(guild):
+        async with semaphore:
+            if not guild.me.guild_permissions.manage_channels:
+                return guild, None, "missing Manage Channels permission"
+            try:
+                channel, created = await ensure_request_channel(guild)
+                return guild, channel, "created" if created else "already set up"
+            except discord.HTTPException as e:
+                return guild, None, f"failed: {e}"
+
+    return await asyncio.gather(*(provision(guild) for guild in guilds))
+
+def prune_stale_channels(bot):
+    """Drop mappings for channels deleted while the bot was offline."""
+    stale = [guild_id for guild_id, channel_id in request_channels.items()
+             if (guild := bot.get_guild(int(guild_id))) is not None and guild.get_channel(int(channel_id)) is None]
+    for guild_id in stale:
+        logger.warning(f"Request channel {request_channels[guild_id]} not found. Removing from saved data.")
+        del request_channels[guild_id]
+    if stale:
+        save_request_channels()
 
 class SetupCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        config.load_overrides()
         load_request_channels()  # Load request channels when the cog is initialized
+        if bot.is_ready():
+            prune_stale_channels(bot)
 
     @commands.Cog.listener()
     async def on_ready(self):
+        prune_stale_channels(self.bot)
         logger.info("Setup cog is ready.")
 
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Forget a request channel as soon as it is deleted."""
+        guild_id = str(channel.guild.id)
+        if request_channels.get(guild_id) == str(channel.id):
+            logger.warning(f"Request channel {channel.id} was deleted. Removing from saved data.")
+            del request_channels[guild_id]
+            save_request_channels()
+
+        extra_channels = config.get_overrides(guild_id).get("extra_request_channel_ids", ())
+        if str(channel.id) in map(str, extra_channels):
+            logger.warning(f"Extra request channel {channel.id} was deleted. Removing from guild config.")
+            remaining = sorted(str(channel_id) for channel_id in extra_channels if str(channel_id) != str(channel.id))
+            config.set_overrides(guild_id, extra_request_channel_ids=remaining or None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        if request_channels.pop(str(guild.id), None) is not None:
+            save_request_channels()
+
     @discord.app_commands.command(name="setup", description="Set up a channel to receive dragme requests.")
     async def setup(self, interaction: discord.Interaction):
         if not interaction.user.guild_permissions.administrator:
@@ -55,24 +146,16 @@ class SetupCog(commands.Cog):
             ), ephemeral=True)
             return
 
-        guild_id = str(interaction.guild.id)
-
-        # Check if a request channel already exists for this guild
-        if guild_id in request_channels:
-            existing_channel_id = request_channels[guild_id]
-            existing_channel = interaction.guild.get_channel(int(existing_channel_id))
-            if existing_channel:
-                await interaction.response.send_message(embed=discord.Embed(
-                    title="Error",
-                    description=f"A request channel is already set up: {existing_channel.mention}",
-                    color=discord.Color.red()
-                ), ephemeral=True)
-                return
-            else:
-                # If the channel doesn't exist, remove it from the dictionary
-                logger.warning(f"Request channel {existing_channel_id} not found. Removing from saved data.")
-                del request_channels[guild_id]
-                save_request_channels()
+        # Stale entries are removed by on_guild_channel_delete, so a mapping means a live channel
+        existing_channel_id = request_channels.get(str(interaction.guild.id))
+        existing_channel = interaction.guild.get_channel(int(existing_channel_id)) if existing_channel_id else None
+        if existing_channel:
+            await interaction.response.send_message(embed=discord.Embed(
+                title="Error",
+                description=f"A request channel is already set up: {existing_channel.mention}",
+                color=discord.Color.red()
+            ), ephemeral=True)
+            return
 
         if not interaction.guild.me.guild_permissions.manage_channels:
             await interaction.response.send_message(embed=discord.Embed(
@@ -83,10 +166,15 @@ class SetupCog(commands.Cog):
             return
 
         try:
-            # Create a new request channel if none exists
-            request_channel = await interaction.guild.create_text_channel("drag-requests")
-            request_channels[guild_id] = str(request_channel.id)  # Save as string
-            save_request_channels()  # Save the new request channel data
+            # Create a new request channel if none exists; concurrent calls share one creation
+            request_channel, created = await ensure_request_channel(interaction.guild)
+            if not created:
+                await interaction.response.send_message(embed=discord.Embed(
+                    title="Error",
+                    description=f"A request channel is already set up: {request_channel.mention}",
+                    color=discord.Color.red()
+                ), ephemeral=True)
+                return
             await interaction.response.send_message(embed=discord.Embed(
                 title="Setup Complete",
                 description=f"Request channel {request_channel.mention} has been created successfully!",
@@ -105,5 +193,83 @@ class SetupCog(commands.Cog):
                 color=discord.Color.red()
             ), ephemeral=True)
 
+    @discord.app_commands.command(name="setupall", description="Owner only: set up request channels in every server.")
+    async def setupall(self, interaction: discord.Interaction):
+        if interaction.user.id not in config.settings.owner_ids:
+            await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        results = await provision_guilds(self.bot.guilds)
+        summary = {}
+        for _, _, outcome in results:
+            summary[outcome] = summary.get(outcome, 0) + 1
+        lines = [f"{count} × {outcome}" for outcome, count in sorted(summary.items())]
+        await interaction.followup.send(embed=discord.Embed(
+            title="Provisioning Complete",
+            description="\n".join(lines) or "No servers to set up.",
+            color=discord.Color.green()
+        ), ephemeral=True)
+
+    @discord.app_commands.command(name="config", description="View or change this server's dragme settings.")
+    @discord.app_commands.describe(
+        request_timeout="Seconds before an unanswered request expires",
+        cooldown="Seconds a member must wait between /dragmee requests",
+        allowed_role="Add or remove a role allowed to use /dragmee (no roles = everyone)",
+        extra_channel="Add or remove an extra channel where /dragmee is accepted",
+        reset="Restore the default settings"
+    )
+    async def config_command(
+        self,
+        interaction: discord.Interaction,
+        request_timeout: discord.app_commands.Range[int, 10, 900] = None,
+        cooldown: discord.app_commands.Range[int, 0, 3600] = None,
+        allowed_role: discord.Role = None,
+        extra_channel: discord.TextChannel = None,
+        reset: bool = False
+    ):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(embed=discord.Embed(
+                title="Permission Denied",
+                description="You must have administrator permissions to use this command.",
+                color=discord.Color.red()
+            ), ephemeral=True)
+            return
+
+        guild_id = interaction.guild.id
+        if reset:
+            config.reset_overrides(guild_id)
+        else:
+            overrides = config.get_overrides(guild_id)
+            changes = {}
+            if request_timeout is not None:
+                changes["request_timeout"] = request_timeout
+            if cooldown is not None:
+                changes["dragme_cooldown"] = cooldown
+            if allowed_role is not None:
+                roles = set(overrides.get("allowed_role_ids", ()))
+                roles ^= {str(allowed_role.id)}  # Toggle
+                changes["allowed_role_ids"] = sorted(roles) or None
+            if extra_channel is not None:
+                channels = set(overrides.get("extra_request_channel_ids", ()))
+                channels ^= {str(extra_channel.id)}
+                changes["extra_request_channel_ids"] = sorted(channels) or None
+            if changes:
+                config.set_overrides(guild_id, **changes)
+
+        guild_config = config.snapshot.get(guild_id)
+        roles = ", ".join(f"<@&{role_id}>" for role_id in guild_config.allowed_role_ids) or "Everyone"
+        channels = ", ".join(f"<#{channel_id}>" for channel_id in guild_config.request_channel_ids) or "None (run /setup)"
+        await interaction.response.send_message(embed=discord.Embed(
+            title="Dragme Settings",
+            description=(
+                f"Request timeout: {guild_config.request_timeout}s\n"
+                f"Cooldown: {guild_config.dragme_cooldown}s\n"
+                f"Allowed roles: {roles}\n"
+                f"Request channels: {channels}"
+            ),
+            color=discord.Color.green()
+        ), ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(SetupCog(bot))
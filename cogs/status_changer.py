@@ -1,40 +1,117 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import datetime
 import logging
 import os
+import string
+import time
+from admission import PRIORITY_LOW
 
 # Set up logging
 logging.basicConfig(filename='status_change.log', level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+PRESENCE_MIN_INTERVAL = 15  # Minimum seconds between counter-driven presence updates
+
+class _KeepMissing(dict):
+    """Leaves unknown placeholders such as {typo} untouched instead of raising."""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+def template_fields(template):
+    """Return the set of placeholder names used by a status template."""
+    try:
+        return {field for _, field, _, _ in string.Formatter().parse(template) if field}
+    except ValueError:  # Unbalanced braces, treat the line as static text
+        return set()
+
 class StatusCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # The day's drag count lives on the bot, so reloading the cog on reconnect doesn't reset it
+        if not hasattr(bot, "drag_tally"):
+            bot.drag_tally = {"day": datetime.datetime.now(datetime.timezone.utc).date(), "count": 0}
+        self.drag_tally = bot.drag_tally
+        # Counters kept up to date by event listeners, so rendering never scans guilds or members
+        self.counters = {
+            "voice_users": 0,
+            "guilds": 0,
+            "pending_requests": 0,
+            "drags_today": self.drag_tally["count"],
+        }
+        self.templates = []
+        self.templates_mtime = None
+        self.template_index = -1
+        self.current_template = None
+        self.current_fields = set()
+        self.last_rendered = None
+        self.last_pushed_at = 0.0
+        self.refresh_task = None
         self.status_cycle.start()
 
-    @tasks.loop(seconds=60)  # Adjust the loop interval as needed
-    async def status_cycle(self):
-        """Cycles through status messages from text.txt."""
-        try:
-            if not os.path.exists("text.txt"):
-                logging.error("text.txt file not found")
-                return
+    def cog_unload(self):
+        self.status_cycle.cancel()
+        if self.refresh_task:
+            self.refresh_task.cancel()
 
-            with open("text.txt", "r") as file:
-                lines = file.readlines()
+    def load_templates(self):
+        """Read text.txt, only re-parsing it when the file has changed."""
+        if not os.path.exists("text.txt"):
+            logging.error("text.txt file not found")
+            return self.templates
 
-            if not lines:
+        mtime = os.path.getmtime("text.txt")
+        if mtime != self.templates_mtime:
+            with open("text.txt", "r") as file:
+                self.templates = [line.strip() for line in file if line.strip()]
+            self.templates_mtime = mtime
+            if not self.templates:
                 logging.warning("text.txt file is empty")
-                return
+        return self.templates
 
-            for line in lines:
-                await self.change_status(line.strip())  # Cycle through each status
-                await asyncio.sleep(60)  # Delay between status changes
+    def render(self, template):
+        """Fill a template from the current counters."""
+        self._roll_day()
+        if not self.current_fields:
+            return template
+        return template.format_map(_KeepMissing(self.counters))
 
+    @tasks.loop(seconds=60)  # Adjust the loop interval as needed
+    async def status_cycle(self):
+        """Cycles through status templates from text.txt."""
+        try:
+            templates = self.load_templates()
+            if not templates:
+                return
+
+            self.template_index = (self.template_index + 1) % len(templates)
+            self.current_template = templates[self.template_index]
+            self.current_fields = template_fields(self.current_template)
+            await self.push_if_changed()
         except Exception as e:
             logging.error(f"Unexpected error occurred while cycling status: {e}")
 
+    @status_cycle.before_loop
+    async def before_status_cycle(self):
+        await self.bot.wait_until_ready()
+        self.seed_counters()
+
+    async def push_if_changed(self):
+        """Render the current template and only update the presence if the text changed."""
+        if self.current_template is None:
+            return
+        rendered = self.render(self.current_template)
+        if rendered == self.last_rendered:
+            return
+        # Presence updates are cosmetic; skip them while the API is under pressure
+        if not self.bot.admission.check(PRIORITY_LOW)[0]:
+            return
+        self.last_rendered = rendered
+        self.last_pushed_at = time.monotonic()
+        await self.change_status(rendered)
+
     async def change_status(self, message):
         """Changes the bot's status and custom status message."""
         try:
@@ -52,6 +129,74 @@ class StatusCog(commands.Cog):
         except Exception as e:
             logging.error(f"Unexpected error occurred while changing status: {e}")
 
+    # --- Counters -----------------------------------------------------------------
+
+    def seed_counters(self):
+        """One-off count at startup; listeners keep the numbers current afterwards."""
+        self.counters["guilds"] = len(self.bot.guilds)
+        self.counters["voice_users"] = sum(self._guild_voice_users(guild) for guild in self.bot.guilds)
+
+    @staticmethod
+    def _guild_voice_users(guild):
+        return sum(len(channel.members) for channel in guild.voice_channels + guild.stage_channels)
+
+    def _roll_day(self):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        if today != self.drag_tally["day"]:
+            self.drag_tally["day"] = today
+            self.drag_tally["count"] = self.counters["drags_today"] = 0
+
+    def bump(self, name, delta):
+        """Adjust a counter and refresh the presence if the current template shows it."""
+        self._roll_day()
+        self.counters[name] = max(0, self.counters[name] + delta)
+        if name == "drags_today":
+            self.drag_tally["count"] = self.counters[name]
+        if name in self.current_fields:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        """Coalesce bursts of counter changes into one presence update."""
+        if self.refresh_task and not self.refresh_task.done():
+            return
+        delay = max(0.0, PRESENCE_MIN_INTERVAL - (time.monotonic() - self.last_pushed_at))
+        self.refresh_task = asyncio.create_task(self._refresh_after(delay))
+
+    async def _refresh_after(self, delay):
+        await asyncio.sleep(delay)
+        await self.push_if_changed()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if before.channel is None and after.channel is not None:
+            self.bump("voice_users", 1)
+        elif before.channel is not None and after.channel is None:
+            self.bump("voice_users", -1)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.bump("guilds", 1)
+        self.bump("voice_users", self._guild_voice_users(guild))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.bump("guilds", -1)
+        self.bump("voice_users", -self._guild_voice_users(guild))
+
+    @commands.Cog.listener()
+    async def on_drag_request_created(self, view):
+        self.bump("pending_requests", 1)
+
+    @commands.Cog.listener()
+    async def on_drag_request_finished(self, view, outcome):
+        self.bump("pending_requests", -1)
+        if outcome == "accepted":
+            self.bump("drags_today", 1)
+
+    @commands.Cog.listener()
+    async def on_drag_waitlist_moved(self, member, channel):
+        self.bump("drags_today", 1)
+
     @commands.Cog.listener()
     async def on_ready(self):
         """Starts the status cycling when the bot is ready."""
@@ -0,0 +1,305 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import array
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from .voice_index import voice_index
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "voice_stats.bin"
+SNAPSHOT_MAGIC = b"VOCC"
+SNAPSHOT_VERSION = 1
+
+# (name, seconds per slot, number of slots): 24 hours of minutes, 7 days of hours, 90 days
+RESOLUTIONS = (
+    ("minute", 60, 1440),
+    ("hour", 3600, 168),
+    ("day", 86400, 90),
+)
+
+_numpy = False  # Not imported until /voicestats first needs it; None if unavailable
+
+_HEADER = struct.Struct("<4sHI")
+_CHANNEL = struct.Struct("<QQH")
+_BUCKET = struct.Struct("<q")
+
+
+class OccupancyRing:
+    """Fixed-size ring of peak occupancy per time slot, stored as uint16."""
+
+    __slots__ = ("step", "size", "values", "last_bucket")
+
+    def __init__(self, step, size):
+        self.step = step
+        self.size = size
+        self.values = array.array("H", bytes(2 * size))
+        self.last_bucket = None
+
+    def advance(self, now, carry):
+        """Move the ring up to ``now``; skipped slots held ``carry`` users the whole time."""
+        bucket = int(now // self.step)
+        if self.last_bucket is None:
+            self.values[bucket % self.size] = carry
+        elif bucket > self.last_bucket:
+            for b in range(max(self.last_bucket + 1, bucket - self.size + 1), bucket + 1):
+                self.values[b % self.size] = carry
+        self.last_bucket = bucket
+        return bucket % self.size
+
+    def record(self, now, occupancy, previous):
+        index = self.advance(now, previous)
+        if occupancy > self.values[index]:
+            self.values[index] = min(occupancy, 0xFFFF)
+
+    def ordered(self):
+        """Values oldest first, ending with the current slot."""
+        start = (self.last_bucket + 1) % self.size if self.last_bucket is not None else 0
+        return self.values[start:] + self.values[:start]
+
+
+class ChannelOccupancy:
+    __slots__ = ("guild_id", "occupancy", "rings")
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.occupancy = 0
+        self.rings = [OccupancyRing(step, size) for _, step, size in RESOLUTIONS]
+
+    def update(self, occupancy, now=None):
+        now = time.time() if now is None else now
+        for ring in self.rings:
+            ring.record(now, occupancy, self.occupancy)
+        self.occupancy = occupancy
+
+    def catch_up(self, now=None):
+        now = time.time() if now is None else now
+        for ring in self.rings:
+            ring.advance(now, self.occupancy)
+
+
+def dump_snapshot(channels):
+    """Serialize all rings into one compressed blob."""
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(channels))]
+    for channel_id, stats in channels.items():
+        parts.append(_CHANNEL.pack(channel_id, stats.guild_id, stats.occupancy))
+        for ring in stats.rings:
+            parts.append(_BUCKET.pack(-1 if ring.last_bucket is None else ring.last_bucket))
+            values = ring.values
+            if sys.byteorder == "big":
+                values = array.array("H", values)
+                values.byteswap()
+            parts.append(values.tobytes())
+    return zlib.compress(b"".join(parts), 6)
+
+
+def load_snapshot(blob):
+    """Inverse of ``dump_snapshot``; returns a dict of channel ID to ChannelOccupancy."""
+    data = zlib.decompress(blob)
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Unknown voice stats snapshot format")
+    offset = _HEADER.size
+    channels = {}
+    for _ in range(count):
+        channel_id, guild_id, _ = _CHANNEL.unpack_from(data, offset)
+        offset += _CHANNEL.size
+        stats = ChannelOccupancy(guild_id)
+        # The saved occupancy is stale: nobody was counted while the bot was down, so the gap up to
+        # the first live reading is carried as 0 rather than as the value at shutdown
+        stats.occupancy = 0
+        for ring in stats.rings:
+            (last_bucket,) = _BUCKET.unpack_from(data, offset)
+            offset += _BUCKET.size
+            ring.last_bucket = None if last_bucket < 0 else last_bucket
+            end = offset + 2 * ring.size
+            ring.values = array.array("H", data[offset:end])
+            if sys.byteorder == "big":
+                ring.values.byteswap()
+            offset = end
+        channels[channel_id] = stats
+    return channels
+
+
+def load_numpy():
+    """Import NumPy on first use; it is the slowest import in the bot and only /voicestats needs it."""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # Aggregation falls back to plain Python over the same arrays
+            _numpy = None
+    return _numpy
+
+
+def summarize(rows):
+    """Per-channel (peak, mean) plus the summed occupancy per slot across channels."""
+    numpy = load_numpy()
+    if numpy is not None:
+        matrix = numpy.vstack([numpy.frombuffer(row, dtype=numpy.uint16) for row in rows])
+        peaks = matrix.max(axis=1)
+        means = matrix.mean(axis=1)
+        return list(zip(peaks.tolist(), means.tolist())), matrix.sum(axis=0, dtype=numpy.uint32).tolist()
+    per_channel = [(max(row), sum(row) / len(row)) for row in rows]
+    totals = [sum(column) for column in zip(*rows)]
+    return per_channel, totals
+
+
+def hourly_profile(rows):
+    """Average combined occupancy for each UTC hour of the day, from hour-resolution rings.
+
+    The hour ring holds a whole number of days, so slot ``i`` always covers UTC hour ``i % 24``.
+    """
+    numpy = load_numpy()
+    if numpy is not None:
+        matrix = numpy.vstack([numpy.frombuffer(row, dtype=numpy.uint16) for row in rows])
+        return matrix.sum(axis=0, dtype=numpy.uint32).reshape(-1, 24).mean(axis=0).tolist()
+    totals = [sum(column) for column in zip(*rows)]
+    days = len(totals) // 24
+    return [sum(totals[hour::24]) / days for hour in range(24)]
+
+
+class VoiceAnalytics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.channels = {}  # Voice channel ID -> ChannelOccupancy
+        self.load()
+        self.snapshot_loop.start()
+
+    def cog_unload(self):
+        self.snapshot_loop.cancel()
+        self.save()
+
+    def load(self):
+        if not os.path.exists(SNAPSHOT_FILE):
+            return
+        try:
+            with open(SNAPSHOT_FILE, "rb") as f:
+                self.channels = load_snapshot(f.read())
+            logger.info(f"Loaded voice stats for {len(self.channels)} channels.")
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            logger.warning(f"Could not read {SNAPSHOT_FILE}, starting with empty voice stats: {e}")
+            self.channels = {}
+
+    def save(self):
+        """Write the snapshot to a temp file and swap it in so a crash never leaves half a file."""
+        try:
+            blob = dump_snapshot(self.channels)
+            with open(SNAPSHOT_FILE + ".tmp", "wb") as f:
+                f.write(blob)
+            os.replace(SNAPSHOT_FILE + ".tmp", SNAPSHOT_FILE)
+            logger.info(f"Saved voice stats snapshot ({len(blob)} bytes).")
+        except OSError as e:
+            logger.error(f"Failed to save voice stats: {e}")
+
+    def _stats(self, channel):
+        stats = self.channels.get(channel.id)
+        if stats is None:
+            stats = self.channels[channel.id] = ChannelOccupancy(channel.guild.id)
+        return stats
+
+    @tasks.loop(minutes=10)
+    async def snapshot_loop(self):
+        self.save()
+
+    @snapshot_loop.before_loop
+    async def before_snapshot_loop(self):
+        await self.bot.wait_until_ready()
+        # Pick up whoever is already connected without recording a spike
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels + guild.stage_channels:
+                self._stats(channel).update(len(channel.members))
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if before.channel == after.channel:
+            return
+        now = time.time()
+        if before.channel is not None:
+            stats = self._stats(before.channel)
+            stats.update(max(0, stats.occupancy - 1), now)
+        if after.channel is not None:
+            stats = self._stats(after.channel)
+            stats.update(stats.occupancy + 1, now)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.channels.pop(channel.id, None)
+
+    @app_commands.command(name="voicestats", description="Show when this server's voice channels are busiest.")
+    @app_commands.describe(resolution="Time window to aggregate over", channel="Only show this voice channel")
+    @app_commands.choices(resolution=[
+        app_commands.Choice(name="Last 24 hours (per minute)", value="minute"),
+        app_commands.Choice(name="Last 7 days (per hour)", value="hour"),
+        app_commands.Choice(name="Last 90 days (per day)", value="day"),
+    ])
+    async def voicestats(self, interaction: discord.Interaction, resolution: str = "hour", channel: str = None):
+        """Aggregate the occupancy rings for every voice channel in the guild."""
+        guild_channels = [(channel_id, stats) for channel_id, stats in self.channels.items()
+                          if stats.guild_id == interaction.guild.id
+                          and (channel is None or str(channel_id) == channel)]
+        if not guild_channels:
+            await interaction.response.send_message("No voice activity has been recorded yet.", ephemeral=True)
+            return
+
+        level = [name for name, _, _ in RESOLUTIONS].index(resolution)
+        now = time.time()
+        rows = []
+        for _, stats in guild_channels:
+            stats.catch_up(now)
+            rows.append(stats.rings[level].ordered())
+
+        per_channel, totals = summarize(rows)
+        ranked = sorted(zip(guild_channels, per_channel), key=lambda item: item[1][0], reverse=True)[:5]
+
+        embed = discord.Embed(title="Voice Activity", color=discord.Color.blurple())
+        lines = []
+        for (channel_id, _), (peak, mean) in ranked:
+            lines.append(f"<#{channel_id}> — peak {peak}, average {mean:.1f}")
+        embed.add_field(name="Busiest channels", value="\n".join(lines), inline=False)
+
+        _, step, size = RESOLUTIONS[level]
+        busiest = max(range(size), key=totals.__getitem__)
+        slot_start = int(now // step - (size - 1 - busiest)) * step
+        embed.add_field(
+            name="Busiest slot",
+            value=f"<t:{slot_start}:f> with {totals[busiest]} users in voice",
+            inline=False
+        )
+
+        if resolution == "hour":
+            profile = hourly_profile([stats.rings[level].values for _, stats in guild_channels])
+            top_hours = sorted(range(24), key=profile.__getitem__, reverse=True)[:3]
+            embed.add_field(
+                name="Busiest hours (UTC)",
+                value=", ".join(f"{hour:02d}:00 ({profile[hour]:.1f})" for hour in top_hours),
+                inline=False
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @voicestats.autocomplete("channel")
+    async def channel_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest voice channels with recorded stats, occupied ones first."""
+        occupied = voice_index.guilds.get(interaction.guild.id)
+        occupied = occupied.channels if occupied else {}
+        current = current.casefold()
+        choices = []
+        for channel_id, stats in self.channels.items():
+            if stats.guild_id != interaction.guild.id:
+                continue
+            channel = interaction.guild.get_channel(channel_id)
+            if channel is None or current not in channel.name.casefold():
+                continue
+            choices.append((-len(occupied.get(channel_id, ())), channel.name, channel_id))
+        choices.sort()
+        return [app_commands.Choice(name=name[:100], value=str(channel_id)) for _, name, channel_id in choices[:25]]
+
+async def setup(bot):
+    await bot.add_cog(VoiceAnalytics(bot))
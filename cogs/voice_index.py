@@ -0,0 +1,177 @@
+import discord
+from discord.ext import commands
+import bisect
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 25  # Discord accepts at most 25 autocomplete choices
+
+
+class GuildVoiceIndex:
+    """Members currently in voice for one guild, searchable by display name."""
+
+    __slots__ = ("members", "names", "channels")
+
+    def __init__(self):
+        self.members = {}  # Member ID -> (search key, display name, channel ID)
+        self.names = []  # Sorted (search key, member ID) pairs for prefix lookups
+        self.channels = {}  # Channel ID -> set of member IDs
+
+    def add(self, member_id, display_name, channel_id):
+        self.remove(member_id)
+        key = display_name.casefold()
+        self.members[member_id] = (key, display_name, channel_id)
+        bisect.insort(self.names, (key, member_id))
+        self.channels.setdefault(channel_id, set()).add(member_id)
+
+    def remove(self, member_id):
+        entry = self.members.pop(member_id, None)
+        if entry is None:
+            return
+        key, _, channel_id = entry
+        i = bisect.bisect_left(self.names, (key, member_id))
+        if i < len(self.names) and self.names[i] == (key, member_id):
+            del self.names[i]
+        members = self.channels.get(channel_id)
+        if members is not None:
+            members.discard(member_id)
+            if not members:
+                del self.channels[channel_id]
+
+    def exact(self, name):
+        """Member IDs whose display name equals ``name``, ignoring case."""
+        key = name.casefold().strip()
+        matches = []
+        i = bisect.bisect_left(self.names, (key,))
+        while i < len(self.names) and self.names[i][0] == key:
+            matches.append(self.names[i][1])
+            i += 1
+        return matches
+
+    def search(self, query, limit=MAX_SUGGESTIONS, exclude=None):
+        """Prefix matches first, then fuzzy (in-order subsequence) matches, best first."""
+        query = query.casefold().strip()
+        results = []
+        seen = set()
+
+        i = bisect.bisect_left(self.names, (query,))
+        while i < len(self.names) and len(results) < limit:
+            key, member_id = self.names[i]
+            if not key.startswith(query):
+                break
+            if member_id != exclude:
+                results.append(member_id)
+                seen.add(member_id)
+            i += 1
+
+        if len(results) < limit and query:
+            scored = []
+            for key, member_id in self.names:
+                if member_id in seen or member_id == exclude:
+                    continue
+                score = _fuzzy_score(query, key)
+                if score is not None:
+                    scored.append((score, key, member_id))
+            scored.sort()
+            results.extend(member_id for _, _, member_id in scored[:limit - len(results)])
+        return results
+
+
+def _fuzzy_score(query, key):
+    """Lower is better; None when the query characters do not appear in order."""
+    if query in key:
+        return key.index(query)
+    position = -1
+    gaps = 0
+    for char in query:
+        found = key.find(char, position + 1)
+        if found == -1:
+            return None
+        gaps += found - position - 1
+        position = found
+    return len(key) + gaps
+
+
+class VoiceIndex:
+    def __init__(self):
+        self.guilds = {}  # Guild ID -> GuildVoiceIndex
+
+    def guild(self, guild_id):
+        index = self.guilds.get(guild_id)
+        if index is None:
+            index = self.guilds[guild_id] = GuildVoiceIndex()
+        return index
+
+    def update(self, member, channel):
+        """Record ``member`` as being in ``channel`` (or out of voice when it is None)."""
+        index = self.guild(member.guild.id)
+        if channel is None:
+            index.remove(member.id)
+        else:
+            index.add(member.id, member.display_name, channel.id)
+
+    def rebuild(self, guild):
+        index = self.guilds[guild.id] = GuildVoiceIndex()
+        for channel in guild.voice_channels + guild.stage_channels:
+            for member in channel.members:
+                index.add(member.id, member.display_name, channel.id)
+
+    def search(self, guild_id, query, limit=MAX_SUGGESTIONS, exclude=None):
+        index = self.guilds.get(guild_id)
+        if index is None:
+            return []
+        return index.search(query, limit, exclude)
+
+    def exact(self, guild_id, name):
+        index = self.guilds.get(guild_id)
+        return index.exact(name) if index else []
+
+    def entry(self, guild_id, member_id):
+        index = self.guilds.get(guild_id)
+        return index.members.get(member_id) if index else None
+
+    def occupancy(self, guild_id, channel_id):
+        """Members in a voice channel, without scanning the guild's voice states."""
+        index = self.guilds.get(guild_id)
+        return len(index.channels.get(channel_id, ())) if index else 0
+
+
+# Shared index, imported by the cogs that offer autocomplete
+voice_index = VoiceIndex()
+
+
+class VoiceIndexCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        if bot.is_ready():
+            for guild in bot.guilds:
+                voice_index.rebuild(guild)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            voice_index.rebuild(guild)
+        logger.info(f"Voice index built for {len(self.bot.guilds)} guilds.")
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if before.channel != after.channel:
+            voice_index.update(member, after.channel)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        # Keep the search key in sync with nickname changes
+        if before.display_name != after.display_name and after.voice and after.voice.channel:
+            voice_index.update(after, after.voice.channel)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        voice_index.rebuild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        voice_index.guilds.pop(guild.id, None)
+
+async def setup(bot):
+    await bot.add_cog(VoiceIndexCog(bot))
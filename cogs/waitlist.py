@@ -0,0 +1,128 @@
+import collections
+import time
+
+WAITLIST_TIMEOUT = 600  # Seconds an accepted request may wait for a free slot
+MAX_WAITLIST = 25  # Waiting members per channel
+
+
+class WaitlistEntry:
+    __slots__ = ("member_id", "guild_id", "channel_id", "deadline", "trace_context")
+
+    def __init__(self, member_id, guild_id, channel_id, deadline, trace_context=None):
+        self.member_id = member_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.deadline = deadline  # Wall clock, so it survives a restart handoff
+        self.trace_context = trace_context
+
+    def to_handoff(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class VoiceWaitlist:
+    """FIFO queues of accepted requests waiting for a slot in a full voice channel.
+
+    Cancelled, superseded and expired entries are left in their queue and skipped when they
+    reach the front, so every operation a voice event triggers is O(1) amortized.
+    """
+
+    def __init__(self, index=None):
+        # Voice index for O(1) occupancy. Set by the dragme cog on every load: this module is not an
+        # extension and is never reloaded, while cogs.voice_index is, so an import here would go stale
+        self.index = index
+        self.channels = {}  # Voice channel ID -> deque of entries, oldest first
+        self.members = {}  # Member ID -> their live entry; a member waits for one channel at a time
+        self.arriving = {}  # Voice channel ID -> member IDs being moved in, not yet seen in voice state
+
+    def free_slots(self, channel):
+        if not channel.user_limit:
+            return MAX_WAITLIST  # No limit, always room
+        if self.index is None:
+            occupied = len(channel.members)
+        else:
+            occupied = self.index.occupancy(channel.guild.id, channel.id)
+        occupied += len(self.arriving.get(channel.id, ()))
+        return channel.user_limit - occupied
+
+    def is_full(self, channel):
+        return self.free_slots(channel) <= 0
+
+    def _live(self, entry, now):
+        return self.members.get(entry.member_id) is entry and entry.deadline > now
+
+    def position(self, member_id):
+        """1-based place in line, or None when the member is not waiting."""
+        entry = self.members.get(member_id)
+        if entry is None:
+            return None
+        now = time.time()
+        position = 0
+        for queued in self.channels[entry.channel_id]:
+            if self._live(queued, now):
+                position += 1
+            if queued is entry:
+                return position
+
+    def add(self, member_id, channel, trace_context=None, deadline=None):
+        """Queue ``member_id`` for ``channel`` and return their position, or None if the line is full."""
+        queue = self.channels.setdefault(channel.id, collections.deque())
+        now = time.time()
+        if sum(1 for queued in queue if self._live(queued, now)) >= MAX_WAITLIST:
+            return None
+        if deadline is None:
+            deadline = time.time() + WAITLIST_TIMEOUT
+        entry = WaitlistEntry(member_id, channel.guild.id, channel.id, deadline, trace_context)
+        self.members[member_id] = entry  # Any older entry for this member is now stale
+        queue.append(entry)
+        return self.position(member_id)
+
+    def discard(self, member_id):
+        self.members.pop(member_id, None)
+
+    def pop_ready(self, channel):
+        """Take the next live entry for ``channel`` if it has a free slot, marking the member as arriving."""
+        queue = self.channels.get(channel.id)
+        if queue is None or self.free_slots(channel) <= 0:
+            return None
+        now = time.time()
+        while queue:
+            entry = queue.popleft()
+            if self.members.get(entry.member_id) is not entry:
+                continue
+            del self.members[entry.member_id]
+            if entry.deadline <= now:
+                continue
+            if not queue:
+                del self.channels[channel.id]
+            self.arriving.setdefault(channel.id, set()).add(entry.member_id)
+            return entry
+        del self.channels[channel.id]
+        return None
+
+    def arrived(self, member_id, channel_id):
+        """The member showed up in the channel, or their move was abandoned."""
+        arriving = self.arriving.get(channel_id)
+        if arriving is not None:
+            arriving.discard(member_id)
+            if not arriving:
+                del self.arriving[channel_id]
+
+    def drop_channel(self, channel_id):
+        for entry in self.channels.pop(channel_id, ()):
+            if self.members.get(entry.member_id) is entry:
+                del self.members[entry.member_id]
+        self.arriving.pop(channel_id, None)
+
+    def live_entries(self):
+        """Entries still waiting, in queue order per channel."""
+        now = time.time()
+        return [entry for queue in self.channels.values() for entry in queue if self._live(entry, now)]
+
+    def clear(self):
+        self.channels.clear()
+        self.members.clear()
+        self.arriving.clear()
+
+
+# Shared waitlist, used by the dragme cog
+waitlist = VoiceWaitlist()
@@ -0,0 +1,151 @@
+import dataclasses
+import json
+import logging
+import os
+import types
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+OVERRIDES_FILE = "guild_config.json"
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    """Process-wide settings, read from the environment once at import."""
+
+    discord_token: str = dataclasses.field(repr=False)
+    owner_ids: frozenset
+    guild_id: int
+    capture_file: str
+    diagnostics_token: str = dataclasses.field(repr=False)
+    profile_update_cooldown: int = 60  # Seconds between avatar/banner updates
+    max_image_bytes: int = 8 * 1024 * 1024  # 8 MB upload limit
+
+
+def load_settings():
+    load_dotenv()
+    owner_ids = os.getenv("OWNER_IDS", "")
+    guild_id = os.getenv("GUILD_ID")
+    return Settings(
+        discord_token=os.getenv("DISCORD_TOKEN"),
+        owner_ids=frozenset(int(owner_id) for owner_id in owner_ids.split(",") if owner_id.strip()),
+        guild_id=int(guild_id) if guild_id else None,
+        capture_file=os.getenv("CAPTURE_FILE"),
+        diagnostics_token=os.getenv("DIAGNOSTICS_TOKEN"),
+    )
+
+
+settings = load_settings()
+
+
+@dataclasses.dataclass(frozen=True)
+class GuildConfig:
+    """Effective per-guild tunables. Empty ``allowed_role_ids`` means everyone may use /dragmee."""
+
+    request_timeout: int = 30
+    dragme_cooldown: int = 60
+    allowed_role_ids: frozenset = frozenset()
+    request_channel_ids: frozenset = frozenset()
+
+
+DEFAULT_GUILD_CONFIG = GuildConfig()
+
+# Keys accepted in guild_config.json, per guild
+OVERRIDABLE = ("request_timeout", "dragme_cooldown", "allowed_role_ids", "extra_request_channel_ids")
+
+
+class ConfigSnapshot:
+    """Immutable guild ID -> GuildConfig view. Handlers read ``config.snapshot`` without locking;
+    changes build a new snapshot and rebind the module attribute in one step."""
+
+    __slots__ = ("_guilds",)
+
+    def __init__(self, guilds):
+        self._guilds = types.MappingProxyType(guilds)
+
+    def get(self, guild_id):
+        return self._guilds.get(guild_id, DEFAULT_GUILD_CONFIG)
+
+    def __len__(self):
+        return len(self._guilds)
+
+
+snapshot = ConfigSnapshot({})
+
+_overrides = {}  # Guild ID (str) -> dict of raw overrides, as stored on disk
+_request_channels = {}  # Live mapping owned by cogs.setup, guild ID (str) -> channel ID (str)
+
+
+def compile_snapshot(request_channels, overrides):
+    guilds = {}
+    for guild_id in set(request_channels) | set(overrides):
+        raw = overrides.get(guild_id, {})
+        channel_ids = {int(channel_id) for channel_id in raw.get("extra_request_channel_ids", ())}
+        if guild_id in request_channels:
+            channel_ids.add(int(request_channels[guild_id]))
+        guilds[int(guild_id)] = GuildConfig(
+            request_timeout=int(raw.get("request_timeout", DEFAULT_GUILD_CONFIG.request_timeout)),
+            dragme_cooldown=int(raw.get("dragme_cooldown", DEFAULT_GUILD_CONFIG.dragme_cooldown)),
+            allowed_role_ids=frozenset(int(role_id) for role_id in raw.get("allowed_role_ids", ())),
+            request_channel_ids=frozenset(channel_ids),
+        )
+    return ConfigSnapshot(guilds)
+
+
+def rebuild(request_channels=None):
+    """Recompile the snapshot and swap it in. Call after any change to the inputs."""
+    global snapshot, _request_channels
+    if request_channels is not None:
+        _request_channels = request_channels
+    snapshot = compile_snapshot(_request_channels, _overrides)
+
+
+def load_overrides():
+    _overrides.clear()
+    if os.path.exists(OVERRIDES_FILE):
+        with open(OVERRIDES_FILE, "r") as f:
+            try:
+                _overrides.update(json.load(f))
+            except json.JSONDecodeError:
+                logger.warning(f"{OVERRIDES_FILE} is empty or invalid. Using default guild settings.")
+    rebuild()
+
+
+def save_overrides():
+    try:
+        with open(OVERRIDES_FILE + ".tmp", "w") as f:
+            json.dump(_overrides, f, indent=4)
+        os.replace(OVERRIDES_FILE + ".tmp", OVERRIDES_FILE)
+    except IOError as e:
+        logger.error(f"Failed to save guild config: {e}")
+
+
+def get_overrides(guild_id):
+    return dict(_overrides.get(str(guild_id), {}))
+
+
+def set_overrides(guild_id, **changes):
+    """Apply overrides for one guild (``None`` clears a key), persist them and swap the snapshot."""
+    unknown = set(changes) - set(OVERRIDABLE)
+    if unknown:
+        raise ValueError(f"Unknown guild settings: {', '.join(sorted(unknown))}")
+    guild_overrides = dict(_overrides.get(str(guild_id), {}))
+    for key, value in changes.items():
+        if value is None:
+            guild_overrides.pop(key, None)
+        else:
+            guild_overrides[key] = value
+    if guild_overrides:
+        _overrides[str(guild_id)] = guild_overrides
+    else:
+        _overrides.pop(str(guild_id), None)
+    save_overrides()
+    rebuild()
+
+
+def reset_overrides(guild_id):
+    if _overrides.pop(str(guild_id), None) is not None:
+        save_overrides()
+        rebuild()
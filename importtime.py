@@ -0,0 +1,58 @@
+"""Import-time report for the bot's cold start.
+
+Runs ``python -X importtime`` in a fresh interpreter so nothing is already cached in
+``sys.modules``, and summarises where the time goes. Use ``python main.py --import-report``
+or ``python importtime.py [module ...]``.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_TOP = 15
+
+
+def measure(modules, runs=3):
+    """Return ``(total_ms, {module: cumulative_ms})`` for importing ``modules``, best of ``runs``.
+
+    ``total_ms`` only counts top-level imports, so nested modules aren't counted twice.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    best = None
+    for _ in range(runs):
+        # Run from a scratch directory: some modules open log files relative to the working directory
+        with tempfile.TemporaryDirectory() as workdir:
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+                capture_output=True, text=True, cwd=workdir, env=env
+            )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+
+        cumulative = {}
+        total_us = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            depth = len(name) - len(name.lstrip())
+            name = name.strip()
+            cumulative[name] = max(cumulative.get(name, 0), int(cumulative_us) / 1000)
+            if depth == 1:  # Top-level import, its cumulative time includes all children
+                total_us += int(cumulative_us)
+        if best is None or total_us / 1000 < best[0]:
+            best = (total_us / 1000, cumulative)
+    return best
+
+
+def print_report(modules, top=DEFAULT_TOP):
+    total_ms, cumulative = measure(modules)
+    print(f"Cold import of {len(modules)} module(s): {total_ms:.1f} ms")
+    print(f"Slowest {top} imports (cumulative):")
+    for name, ms in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {ms:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    print_report(sys.argv[1:] or ["main"])
@@ -1,15 +1,46 @@
-from flask import Flask
+import hmac
 import threading
+import config
 
-app = Flask('')
+# Imported by create_app() on the server thread at every start; the cold-start gate counts them
+SERVER_IMPORTS = ["flask"]
 
-@app.route('/')
-def home():
-    return "Bot is running!"
+# Set by the diagnostics cog: callable(action, limit) -> dict, run on the bot's event loop
+diagnostics_provider = None
+
+def register_diagnostics(provider):
+    global diagnostics_provider
+    diagnostics_provider = provider
+
+def create_app():
+    # Imported here so the cost overlaps the bot's login on the main thread; it is still paid on every start
+    from flask import Flask, abort, jsonify, request
+
+    app = Flask('')
+
+    @app.route('/')
+    def home():
+        return "Bot is running!"
+
+    @app.route('/debug/memory')
+    def debug_memory():
+        """Owner-only memory diagnostics; requires the X-Diagnostics-Token header."""
+        token = config.settings.diagnostics_token
+        supplied = request.headers.get("X-Diagnostics-Token", "")
+        if not token or not hmac.compare_digest(token, supplied):
+            abort(404)  # Don't advertise the endpoint
+        if diagnostics_provider is None:
+            abort(503)
+        action = request.args.get("action", "census")
+        limit = request.args.get("limit", 10, type=int)
+        return jsonify(diagnostics_provider(action, limit))
+
+    return app
 
 def run():
-    app.run(host='0.0.0.0', port=8080)
+    create_app().run(host='0.0.0.0', port=8080)
 
 def keep_alive():
-    thread = threading.Thread(target=run)
+    # Daemon, so a shutting-down bot isn't kept alive by the web server
+    thread = threading.Thread(target=run, daemon=True)
     thread.start()
@@ -1,35 +1,47 @@
 import discord
 from discord.ext import commands
+import asyncio
 import logging
-import os
-from dotenv import load_dotenv
-from keep_alive import keep_alive  # Flask server to keep bot alive if needed
+import signal
+import sys
+import config
+from keep_alive import keep_alive, SERVER_IMPORTS  # Flask server to keep bot alive if needed, Flask is imported on its thread
+from rest_client import RestClient
+from admission import AdmissionController
+from tracing import Tracer
 
-# Load environment variables
-load_dotenv()
-DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
-
-if not DISCORD_TOKEN:
-    raise ValueError("No DISCORD_TOKEN found in .env file")
-
-# Set up logging
-logging.basicConfig(filename='bot.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Environment variables are loaded once by the config module
+DISCORD_TOKEN = config.settings.discord_token
 
 # Intents setup
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True  # Enable Message Content Intent
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Raw gateway events are only needed when recording a capture for offline replay
+bot = commands.Bot(command_prefix="!", intents=intents, enable_debug_events=bool(config.settings.capture_file))
+bot.rest = RestClient(bot)  # Shared client for raw API calls from any cog
+bot.admission = AdmissionController(bot)  # Sheds work when Discord or the event loop is slow
+bot.tracer = Tracer()  # Sampling and export configured via TRACE_* environment variables
+bot.rest.instrument()
+
+DRAIN_TIMEOUT = 20  # Seconds to let in-flight moves finish; keep below the host's kill timeout
 
 # List of cogs to load
 cogs = [
     "cogs.status_changer",
     "cogs.setup",  # Ensure setup cog is included
+    "cogs.voice_index",
     "cogs.dragme",
-    "cogs.AvatarBannerUpdater" # Other cogs
+    "cogs.voice_analytics",
+    "cogs.AvatarBannerUpdater", # Other cogs
+    "cogs.diagnostics"
 ]
 
+# The capture cog and its hashing/compression imports are only loaded when recording
+if config.settings.capture_file:
+    cogs.append("cogs.capture")
+
 async def load_cogs():
     """Load all specified cogs."""
     for cog in cogs:
@@ -41,10 +53,49 @@ async def load_cogs():
         except Exception as error:
             logging.error(f"Error loading {cog}: {error}")
 
+async def drain():
+    """Shut down without losing work: refuse new requests, finish moves, then close.
+
+    Closing the bot unloads every cog, which is where each cog flushes its state to disk;
+    the dragme cog writes open requests to handoff.json for the next process to resume.
+    """
+    bot.admission.draining = True
+    logging.info("Draining: new /dragmee requests are refused until shutdown.")
+    try:
+        await asyncio.wait_for(bot.admission.wait_for_moves(), DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logging.warning(f"Gave up waiting for {bot.admission.moves_in_flight} move(s) after {DRAIN_TIMEOUT} seconds.")
+    await bot.admission.flush_deferred()  # Request cleanup deferred under load would otherwise be lost
+    await bot.tracer.close()
+    bot.admission.stop()
+    await bot.close()
+    bot.rest.close()
+    logging.info("Drain complete, shutting down.")
+
+drain_task = None
+
+def request_drain():
+    """Signal handler; further signals while draining are ignored."""
+    global drain_task
+    if drain_task is None:
+        drain_task = asyncio.create_task(drain())
+
+@bot.event
+async def setup_hook():
+    """Drain on SIGTERM (deploys) and SIGINT (Ctrl+C) instead of dying mid-request."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_drain)
+        except NotImplementedError:  # Not available on Windows; fall back to the default handling
+            pass
+
 @bot.event
 async def on_ready():
     """When the bot is ready, print the bot info, sync commands, and list registered commands."""
     print(f'Logged in as {bot.user}')
+    bot.admission.start()
+    bot.tracer.start()
 
     # Load cogs before syncing commands
     await load_cogs()
@@ -64,9 +115,25 @@ async def on_ready():
     for command in bot.tree.get_commands():
         print(f"- {command.name}")
 
-# Start Flask (if you want to keep the bot alive on platforms like Replit)
-keep_alive()
+def main():
+    if "--import-report" in sys.argv:
+        # Show where cold-start time goes without connecting to Discord
+        import importtime
+        importtime.print_report(["main"] + cogs + SERVER_IMPORTS)
+        return
+
+    if not DISCORD_TOKEN:
+        raise ValueError("No DISCORD_TOKEN found in .env file")
+
+    # Set up logging; done here rather than at import so tools importing main don't write bot.log
+    logging.basicConfig(filename='bot.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Start Flask (if you want to keep the bot alive on platforms like Replit)
+    keep_alive()
+
+    # Start the bot
+    bot.run(DISCORD_TOKEN)
 
-# Start the bot
-bot.run(DISCORD_TOKEN)
+if __name__ == "__main__":
+    main()
 
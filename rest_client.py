@@ -0,0 +1,135 @@
+import asyncio
+import collections
+import logging
+import time
+
+import discord
+from discord.http import Route
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3  # Extra attempts when discord.py gives up on a long rate limit wait
+RATE_LIMIT_WINDOW = 60  # Seconds of 429 history kept for stats
+
+
+class RouteStats:
+    """Per-bucket counters for calls that went through the shared client."""
+
+    __slots__ = ("calls", "errors", "rate_limited", "total_time", "last_status")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.total_time = 0.0
+        self.last_status = None
+
+
+class _RateLimitLogHandler(logging.Handler):
+    """Counts the 429s discord.py absorbs internally, which it only reports through its logger.
+
+    discord.py logs "responded with 429" once per 429, then a separate "Global rate limit"
+    warning when that 429 was global; the second one only marks the last 429 as global.
+    """
+
+    def __init__(self, client):
+        super().__init__(level=logging.WARNING)
+        self.client = client
+
+    def emit(self, record):
+        message = str(record.msg)
+        if "responded with 429" in message:
+            self.client.record_rate_limit()
+        elif message.startswith("Global rate limit"):
+            self.client.global_rate_limits += 1
+
+
+class RestClient:
+    """Shared REST client owned by the bot.
+
+    Raw endpoint calls go through discord.py's own ``HTTPClient`` so they reuse its pooled
+    keep-alive session, its token and its per-route/global rate limiter. On top of that the
+    client keeps per-bucket stats and a window of recent 429s for the rest of the bot.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.routes = collections.defaultdict(RouteStats)
+        self.rate_limits = collections.deque()  # Timestamps of recent 429s
+        self.global_rate_limits = 0
+        self._log_handler = _RateLimitLogHandler(self)
+        logging.getLogger("discord.http").addHandler(self._log_handler)
+
+    def record_rate_limit(self, is_global=False, bucket=None):
+        """Remember a 429 so callers can see current API pressure."""
+        now = time.monotonic()
+        self.rate_limits.append(now)
+        if is_global:
+            self.global_rate_limits += 1
+        if bucket is not None:
+            self.routes[bucket].rate_limited += 1
+        self._trim(now)
+
+    def recent_rate_limits(self, window=RATE_LIMIT_WINDOW):
+        """Number of 429s seen in the last ``window`` seconds."""
+        now = time.monotonic()
+        self._trim(now)
+        return sum(1 for ts in self.rate_limits if now - ts <= window)
+
+    def _trim(self, now):
+        while self.rate_limits and now - self.rate_limits[0] > RATE_LIMIT_WINDOW:
+            self.rate_limits.popleft()
+
+    async def request(self, method, path, **kwargs):
+        """Send a raw request, e.g. ``request("PATCH", "/users/@me", json=payload)``.
+
+        Path parameters such as ``{guild_id}`` are passed via ``route_params`` so the request
+        lands in the correct rate-limit bucket. Returns the decoded response body.
+
+        discord.py already retries 429s and 5xx responses itself; the only retry here is for
+        ``discord.RateLimited``, raised when a rate limit wait was longer than it would sleep.
+        """
+        route = Route(method, path, **kwargs.pop("route_params", {}))
+        stats = self.routes[route.key]
+
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                data = await self.bot.http.request(route, **kwargs)
+            except discord.RateLimited as e:
+                # discord.py gave up waiting because retry_after exceeded its own timeout;
+                # the 429 itself was already counted through its log record
+                self.routes[route.key].rate_limited += 1
+                if attempt == MAX_RETRIES:
+                    raise
+                logger.warning(f"{route.method} {route.path} rate limited, retrying in {e.retry_after:.2f} seconds")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except discord.HTTPException as e:
+                stats.calls += 1
+                stats.errors += 1
+                stats.last_status = e.status
+                stats.total_time += time.perf_counter() - start
+                if e.status == 429:
+                    # A 429 without rate limit headers (a Cloudflare block), which discord.py doesn't log
+                    self.record_rate_limit(bucket=route.key)
+                raise
+            stats.calls += 1
+            stats.last_status = 200
+            stats.total_time += time.perf_counter() - start
+            return data
+
+    def instrument(self):
+        """Record a tracing span for every call made through discord.py's HTTPClient, raw or not."""
+        http = self.bot.http
+        original = http.request
+
+        async def traced_request(route, **kwargs):
+            with self.bot.tracer.span(f"REST {route.method} {route.path}", bucket=route.key):
+                return await original(route, **kwargs)
+
+        http.request = traced_request
+
+    def close(self):
+        """Detach from discord.py's logger; the HTTP session itself is closed by the bot."""
+        logging.getLogger("discord.http").removeHandler(self._log_handler)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot runs from the repository root and imports its modules as top-level packages
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeBot
+from cogs.capture import CaptureCog
+
+
+def test_reloaded_cog_keeps_the_anonymizer_key_and_start_time():
+    bot = FakeBot()
+    first = CaptureCog(bot)
+    reloaded = CaptureCog(bot)
+
+    assert reloaded.anonymizer is first.anonymizer
+    assert reloaded.anonymizer.snowflake("400000000000000001") == first.anonymizer.snowflake("400000000000000001")
+    assert reloaded.started == first.started
+
+
+def test_only_messages_the_bot_posts_itself_are_recorded_as_bot_messages():
+    bot = FakeBot()
+    bot.user = SimpleNamespace(id=100000000000000001)
+    cog = CaptureCog(bot)
+    cog.path = "capture.jsonl.gz"  # Enables recording; nothing is flushed without the loop
+
+    def message_create(message_id, author_id, **extra):
+        message = {"id": message_id, "channel_id": "400000000000000002", "author": {"id": author_id}, **extra}
+        return json.dumps({"op": 0, "t": "MESSAGE_CREATE", "d": message})
+
+    asyncio.run(cog.on_socket_raw_receive(message_create("430000000000000001", "100000000000000001")))
+    asyncio.run(cog.on_socket_raw_receive(message_create("430000000000000002", "400000000000000005")))
+    asyncio.run(cog.on_socket_raw_receive(message_create("430000000000000003", "100000000000000001",
+                                                         interaction_metadata={"id": "410000000000000000"})))
+
+    records = [json.loads(line) for line in cog.buffer]
+    assert [r["t"] for r in records] == ["BOT_MESSAGE"]
+    assert records[0]["d"] == {"id": cog.anonymizer.snowflake("430000000000000001"),
+                               "channel_id": cog.anonymizer.snowflake("400000000000000002")}
@@ -0,0 +1,15 @@
+import os
+import subprocess
+
+from benchmarks import cold_start
+
+
+def tracked_changes():
+    return subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                          capture_output=True, text=True, cwd=os.path.dirname(cold_start.MAIN_FILE)).stdout
+
+
+def test_startup_imports_fit_the_budget_without_touching_the_tree():
+    before = tracked_changes()
+    assert cold_start.main([]) == 0
+    assert tracked_changes() == before
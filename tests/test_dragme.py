@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeInteraction
+from benchmarks.hot_paths import _dragme_world
+from cogs.dragme import DragmeCog, pending_requests
+
+
+def test_failed_request_send_is_never_reported_as_finished():
+    async def run():
+        bot, guild, requests_channel, requester, target, _ = _dragme_world()
+        dispatched = []
+        bot.dispatch = lambda event, *args: dispatched.append(event)
+
+        async def failing_send(*args, **kwargs):
+            raise RuntimeError("send failed")
+        requests_channel.send = failing_send
+
+        cog = DragmeCog(bot)
+        with pytest.raises(RuntimeError):
+            await cog.dragme.callback(cog, FakeInteraction(bot, guild, requester, requests_channel), str(target.id))
+
+        armed = [handle for handle in asyncio.get_running_loop()._scheduled if not handle.cancelled()]
+        return dispatched, armed
+
+    dispatched, armed = asyncio.run(run())
+    assert dispatched == []
+    assert armed == []  # The request timeout would otherwise fire "drag_request_finished"
+    assert pending_requests == {}
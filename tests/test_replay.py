@@ -0,0 +1,24 @@
+import asyncio
+import os
+
+import discord
+
+from benchmarks import replay
+
+CAPTURE = os.path.join(os.path.dirname(__file__), "fixtures", "capture.jsonl.gz")
+
+
+def test_replay_answers_every_interaction_and_button_click_in_the_checked_in_capture(tmp_path, monkeypatch):
+    # The replay repoints discord.py at its fake API and the cogs write state to the working directory
+    monkeypatch.setattr(discord.http.Route, "BASE", discord.http.Route.BASE)
+    monkeypatch.setattr(discord.webhook.async_.Route, "BASE", discord.webhook.async_.Route.BASE)
+    monkeypatch.chdir(tmp_path)
+
+    dispatched, _, latencies, fed_at, requests = asyncio.run(replay.replay(CAPTURE, speed=0))
+
+    assert dispatched == 5  # One GUILD_CREATE, three /dragmee interactions and an Accept click
+    assert len(fed_at) == 4
+    assert len(latencies) == 4
+    assert requests["POST /interactions/{id}/{token}/callback"] == 4
+    # The click lands on the captured request message, so its view accepts and moves the requester
+    assert requests["PATCH /guilds/{id}/members/{id}"] == 1
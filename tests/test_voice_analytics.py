@@ -0,0 +1,40 @@
+from cogs.voice_analytics import ChannelOccupancy, RESOLUTIONS, dump_snapshot, load_snapshot
+
+HOUR = 3600
+DAY = 86400
+START = 1_700_000_000 - 1_700_000_000 % DAY  # Midnight UTC, so slot boundaries are easy to reason about
+
+
+def ring(stats, name):
+    return stats.rings[[resolution for resolution, _, _ in RESOLUTIONS].index(name)]
+
+
+def test_snapshot_round_trip_keeps_rings():
+    stats = ChannelOccupancy(guild_id=7)
+    stats.update(3, START)
+    stats.update(5, START + 90)
+    stats.update(2, START + HOUR)
+
+    restored = load_snapshot(dump_snapshot({42: stats}))[42]
+
+    assert restored.guild_id == 7
+    for before, after in zip(stats.rings, restored.rings):
+        assert after.last_bucket == before.last_bucket
+        assert after.values == before.values
+
+
+def test_downtime_after_restart_is_not_filled_with_the_occupancy_at_shutdown():
+    stats = ChannelOccupancy(guild_id=7)
+    stats.update(5, START + 10)  # Five users in the channel when the bot shut down
+
+    restored = load_snapshot(dump_snapshot({42: stats}))[42]
+    restarted = START + 3 * DAY + 30
+    restored.update(0, restarted)  # Seeding from the live channel, which is empty now
+    restored.catch_up(restarted + HOUR)
+
+    hours = ring(restored, "hour").ordered()
+    since_shutdown = 3 * 24 + 1  # Hour slots after the shutdown hour, up to the current one
+    assert hours[-since_shutdown - 1] == 5  # The shutdown hour keeps its real peak
+    assert max(hours[-since_shutdown:]) == 0  # Every hour since then was offline or empty
+    days = ring(restored, "day").ordered()
+    assert days[-4] == 5 and days[-3:].tolist() == [0, 0, 0]
@@ -0,0 +1,77 @@
+from benchmarks.fakes import FakeGuild
+from cogs.dragme import DragmeCog
+from cogs.voice_index import GuildVoiceIndex, VoiceIndex, voice_index
+
+
+def make_index(*names):
+    index = GuildVoiceIndex()
+    for member_id, name in enumerate(names, start=1):
+        index.add(member_id, name, 100)
+    return index
+
+
+def test_search_ranks_prefix_matches_before_fuzzy_matches():
+    index = make_index("Sarah Miller", "Sam", "Samantha", "Bob")
+    assert index.search("sam") == [2, 3, 1]
+
+
+def test_search_excludes_member_and_respects_limit():
+    index = make_index("Sam", "Samantha", "Sammy")
+    assert index.search("sam", exclude=1) == [2, 3]
+    assert index.search("sam", limit=1) == [1]
+
+
+def test_search_without_match_is_empty():
+    assert make_index("Sam", "Bob").search("xyz") == []
+
+
+def test_remove_and_rename_update_search_and_channels():
+    index = make_index("Sam", "Bob")
+    index.add(1, "Alice", 200)
+    assert index.search("sam") == []
+    assert index.search("ali") == [1]
+    assert index.channels == {100: {2}, 200: {1}}
+    index.remove(2)
+    assert 100 not in index.channels
+
+
+def test_exact_is_case_insensitive_and_not_fuzzy():
+    index = make_index("Sarah Miller", "Sam", "SAM")
+    assert sorted(index.exact(" sam ")) == [2, 3]
+    assert index.exact("sarah") == []
+
+
+def resolve(guild, value):
+    return DragmeCog.resolve_target(None, guild, value)
+
+
+def setup_guild(monkeypatch, *names):
+    guild = FakeGuild()
+    index = VoiceIndex()
+    monkeypatch.setattr(voice_index, "guilds", index.guilds)
+    room = guild.add_voice_channel("Room")
+    members = []
+    for name in names:
+        member = guild.add_member(name)
+        member.join(room)
+        index.update(member, room)
+        members.append(member)
+    return guild, members
+
+
+def test_resolve_target_accepts_autocomplete_id(monkeypatch):
+    guild, (sarah,) = setup_guild(monkeypatch, "Sarah Miller")
+    assert resolve(guild, str(sarah.id)) is sarah
+
+
+def test_resolve_target_accepts_exact_display_name(monkeypatch):
+    guild, (sarah, _) = setup_guild(monkeypatch, "Sarah Miller", "Bob")
+    assert resolve(guild, "sarah miller") is sarah
+
+
+def test_resolve_target_rejects_fuzzy_and_ambiguous_names(monkeypatch):
+    guild, _ = setup_guild(monkeypatch, "Sarah Miller", "Sam", "sam")
+    assert resolve(guild, "sarah") is None
+    assert resolve(guild, "smi") is None
+    assert resolve(guild, "Sam") is None  # Two members are called that
+    assert resolve(guild, "") is None
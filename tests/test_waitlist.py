@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from cogs.voice_index import VoiceIndex
+from cogs.waitlist import MAX_WAITLIST, VoiceWaitlist
+
+
+class Guild:
+    id = 1
+
+
+class Channel:
+    def __init__(self, channel_id, user_limit):
+        self.id = channel_id
+        self.guild = Guild()
+        self.user_limit = user_limit
+
+
+class Member:
+    def __init__(self, member_id):
+        self.id = member_id
+        self.display_name = f"member{member_id}"
+        self.guild = Guild()
+
+
+@pytest.fixture
+def index():
+    return VoiceIndex()
+
+
+def fill(index, channel, *member_ids):
+    for member_id in member_ids:
+        index.update(Member(member_id), channel)
+
+
+def test_pop_ready_is_fifo_and_waits_for_a_free_slot(index):
+    waitlist = VoiceWaitlist(index)
+    room = Channel(10, user_limit=2)
+    fill(index, room, 1, 2)
+    assert waitlist.is_full(room)
+    assert waitlist.add(100, room) == 1
+    assert waitlist.add(101, room) == 2
+
+    assert waitlist.pop_ready(room) is None  # Still full
+
+    index.update(Member(1), None)
+    entry = waitlist.pop_ready(room)
+    assert entry.member_id == 100
+    assert waitlist.pop_ready(room) is None  # The slot is taken by the member being moved in
+    assert waitlist.arriving == {10: {100}}
+
+
+def test_arrived_releases_the_reserved_slot(index):
+    waitlist = VoiceWaitlist(index)
+    room = Channel(10, user_limit=1)
+    waitlist.add(100, room)
+    waitlist.add(101, room)
+    assert waitlist.pop_ready(room).member_id == 100
+
+    # The move landed: the index now counts the member, so the reservation is dropped
+    fill(index, room, 100)
+    waitlist.arrived(100, room.id)
+    assert waitlist.arriving == {}
+    assert waitlist.pop_ready(room) is None
+
+    index.update(Member(100), None)
+    assert waitlist.pop_ready(room).member_id == 101
+    assert room.id not in waitlist.channels
+
+
+def test_requeued_discarded_and_expired_entries_are_skipped(index):
+    waitlist = VoiceWaitlist(index)
+    room = Channel(10, user_limit=5)
+    waitlist.add(100, room)
+    waitlist.add(101, room)
+    waitlist.add(102, room, deadline=time.time() - 1)
+    waitlist.add(103, room)
+    waitlist.add(100, room)  # Requeued, goes to the back
+    waitlist.discard(101)
+    assert waitlist.position(100) == 2
+
+    assert [waitlist.pop_ready(room).member_id for _ in range(2)] == [103, 100]
+    assert waitlist.pop_ready(room) is None
+    assert waitlist.channels == {}
+
+
+def test_add_refuses_when_the_line_is_full(index):
+    waitlist = VoiceWaitlist(index)
+    room = Channel(10, user_limit=1)
+    for member_id in range(MAX_WAITLIST):
+        assert waitlist.add(member_id, room) == member_id + 1
+    assert waitlist.add(999, room) is None
+
+
+def test_drop_channel_forgets_its_waiters(index):
+    waitlist = VoiceWaitlist(index)
+    room, other = Channel(10, user_limit=1), Channel(11, user_limit=1)
+    waitlist.add(100, room)
+    waitlist.add(101, other)
+    waitlist.arriving[room.id] = {102}
+
+    waitlist.drop_channel(room.id)
+    assert set(waitlist.members) == {101}
+    assert room.id not in waitlist.channels and room.id not in waitlist.arriving
+    assert [entry.member_id for entry in waitlist.live_entries()] == [101]
+
+
+def test_occupancy_follows_the_index_the_cog_hands_over(index):
+    waitlist = VoiceWaitlist(index)
+    room = Channel(10, user_limit=1)
+    fill(index, room, 1)
+    assert waitlist.is_full(room)
+
+    # Reloading cogs.voice_index builds a new index; the dragme cog passes the new one in
+    waitlist.index = VoiceIndex()
+    assert not waitlist.is_full(room)
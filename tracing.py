@@ -0,0 +1,226 @@
+import asyncio
+import collections
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5  # Seconds between batch exports
+MAX_BATCH = 512  # Spans per export call
+MAX_QUEUE = 10000  # Oldest spans are dropped beyond this, tracing must never grow without bound
+SERVICE_NAME = "dragmee-bot"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attributes",
+                 "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, tracer, trace_id, parent_id, name, attributes):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    @property
+    def context(self):
+        """What another interaction needs to continue this trace: (trace ID, parent span ID)."""
+        return (self.trace_id, self.span_id)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when a trace is not sampled, so instrumented code costs next to nothing."""
+
+    __slots__ = ()
+    context = None
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileExporter:
+    """Appends spans as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+
+    async def export(self, spans):
+        lines = "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines):
+        with open(self.path, "a") as f:
+            f.write(lines)
+
+    async def close(self):
+        pass
+
+
+class OtlpExporter:
+    """Posts spans to an OpenTelemetry collector using OTLP/HTTP with JSON encoding."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.session = None
+
+    async def export(self, spans):
+        import aiohttp
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [_otlp_span(span) for span in spans]}],
+        }]}
+        async with self.session.post(self.endpoint, json=payload) as response:
+            if response.status >= 400:
+                logger.warning(f"Trace collector rejected batch: {response.status} {await response.text()}")
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span):
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+class Tracer:
+    """Head-sampled tracer; spans nest through a context variable and are exported in batches.
+
+    Configured from the environment: ``TRACE_SAMPLE_RATE`` (0 to 1, default 0 = off),
+    ``TRACE_OTLP_ENDPOINT`` (e.g. http://localhost:4318/v1/traces) or ``TRACE_FILE``
+    (JSON lines, default traces.jsonl).
+    """
+
+    def __init__(self, sample_rate=None, exporter=None):
+        if sample_rate is None:
+            sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+        self.sample_rate = sample_rate
+        if exporter is None:
+            endpoint = os.getenv("TRACE_OTLP_ENDPOINT")
+            exporter = OtlpExporter(endpoint) if endpoint else FileExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+        self.exporter = exporter
+        self.queue = collections.deque(maxlen=MAX_QUEUE)
+        self._flush_task = None
+
+    def start(self):
+        if self.sample_rate > 0 and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def start_trace(self, name, **attributes):
+        """Open a root span if this trace is sampled."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        return Span(self, f"{random.getrandbits(128):032x}", None, name, attributes)
+
+    def continue_trace(self, name, context, **attributes):
+        """Open a span under a ``Span.context`` saved by an earlier interaction.
+
+        A ``None`` context means the original request was not sampled, so neither is this one.
+        """
+        if context is None:
+            return NOOP_SPAN
+        trace_id, parent_id = context
+        return Span(self, trace_id, parent_id, name, attributes)
+
+    def span(self, name, **attributes):
+        """Child of the current span; a no-op outside a sampled trace."""
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        return Span(self, parent.trace_id, parent.span_id, name, attributes)
+
+    def _finish(self, span):
+        self.queue.append(span)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        """Export everything queued so far in batches of ``MAX_BATCH``."""
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(MAX_BATCH, len(self.queue)))]
+            try:
+                await self.exporter.export(batch)
+            except Exception as e:
+                logger.error(f"Failed to export {len(batch)} spans: {e}")
+                return
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+        await self.exporter.close()